@@ -0,0 +1,6 @@
+"""排班表 → iCal 流程的性能基准
+
+运行方式（在 backend 目录下）：
+
+    python manage.py benchmark_roster --employees 200 --weeks 4 --output result.json
+"""
@@ -0,0 +1,211 @@
+"""按阶段计时排班表 → iCal 的处理流程
+
+每个阶段都由 setup（准备输入，不计时）和 run（被计时的部分）组成，
+每次重复都重新准备输入，避免解析缓存或记忆化让后几次变快。
+计时结束后再单独用 tracemalloc 跑一遍，记录每个阶段的峰值内存。
+"""
+import contextlib
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from converter.cache import roster_cache
+from converter.ical import ShiftScheduler
+from converter.workbook import MultiWeekScheduler
+
+from .workbook import build_roster_workbook
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+SERIALIZERS = ('icalendar', 'fast')
+
+
+def _measure(setup, run, repeat):
+    """返回耗时统计（毫秒）和单独一次运行的峰值内存（KB）"""
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        started = time.perf_counter()
+        run(state)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    state = setup()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def _parsed(data, reader, serializer='icalendar'):
+    """已完成解析的 ShiftScheduler（读取、周信息、日期、员工、班次）"""
+    scheduler = ShiftScheduler(data, reader=reader, serializer=serializer)
+    scheduler.read_excel()
+    scheduler.get_week_info()
+    scheduler.get_days_info()
+    scheduler.get_employees()
+    scheduler.shifts = scheduler.extract_shifts()
+    return scheduler
+
+
+def _loaded(data, reader):
+    scheduler = ShiftScheduler(data, reader=reader)
+    scheduler.read_excel()
+    scheduler.get_week_info()
+    return scheduler
+
+
+def _create_all(scheduler):
+    return [scheduler.create_calendar(employee.row) for employee in scheduler.get_employees()]
+
+
+def scheduler_stages(data, reader, repeat):
+    """ShiftScheduler 各个方法的耗时（第一个工作表）"""
+    stages = {
+        'read_excel': _measure(
+            lambda: ShiftScheduler(data, reader=reader),
+            lambda scheduler: scheduler.read_excel(),
+            repeat,
+        ),
+        'get_days_info': _measure(
+            lambda: _loaded(data, reader),
+            lambda scheduler: scheduler.get_days_info(),
+            repeat,
+        ),
+        'get_employees': _measure(
+            lambda: _loaded(data, reader),
+            lambda scheduler: scheduler.get_employees(),
+            repeat,
+        ),
+        'extract_shifts': _measure(
+            lambda: _loaded(data, reader),
+            lambda scheduler: scheduler.extract_shifts(),
+            repeat,
+        ),
+    }
+
+    # 查找最后一位员工，最坏情况
+    last_name = _parsed(data, reader).get_employees()[-1].name
+    stages['find_employee_row'] = _measure(
+        lambda: _parsed(data, reader),
+        lambda scheduler: scheduler.find_employee_row(last_name),
+        repeat,
+    )
+
+    for serializer in SERIALIZERS:
+        stages[f'create_calendar[{serializer}]'] = _measure(
+            lambda serializer=serializer: _parsed(data, reader, serializer),
+            _create_all,
+            repeat,
+        )
+        stages[f'to_ical[{serializer}]'] = _measure(
+            lambda serializer=serializer: _create_all(_parsed(data, reader, serializer)),
+            lambda calendars: [cal.to_ical() for cal in calendars],
+            repeat,
+        )
+    return stages
+
+
+def multi_week_stages(data, reader, repeat):
+    """多工作表工作簿的整体解析耗时"""
+    def setup():
+        return MultiWeekScheduler(data, reader=reader, max_workers=getattr(settings, 'ROSTER_SHEET_WORKERS', None))
+
+    return {'multi_week_read_excel': _measure(setup, lambda scheduler: scheduler.read_excel(), repeat)}
+
+
+def api_stages(data, all_sheets, repeat):
+    """通过 Django 测试客户端完整请求 /api/convert/，分别测量冷缓存和命中解析缓存"""
+    client = Client()
+
+    def post(_):
+        response = client.post('/api/convert/', {
+            'file': SimpleUploadedFile('roster.xlsx', data),
+            'employee_name': 'Lulu',
+            'all_sheets': 'true' if all_sheets else '',
+        })
+        if response.status_code != 200:
+            raise RuntimeError(f'/api/convert/ 返回 {response.status_code}: {response.content[:200]!r}')
+
+    def cold():
+        roster_cache.clear()
+
+    post(None)  # 预热：导入、数据库连接、进程池
+    return {
+        'api_convert[cold]': _measure(cold, post, repeat),
+        'api_convert[cached]': _measure(lambda: None, post, repeat),
+    }
+
+
+@contextlib.contextmanager
+def isolated_environment():
+    """使用临时测试数据库和临时 media 目录，不影响真实数据"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        # 基准测试连续上传同一文件，不能被上传限流拦下
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, UPLOAD_THROTTLE_RATE=None):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def run_benchmark(employees=30, weeks=1, repeat=5, reader=None, include_api=True, seed=0):
+    """运行全部阶段，返回可直接序列化为 JSON 的结果"""
+    reader = reader or getattr(settings, 'ROSTER_READER', 'streaming')
+    data = build_roster_workbook(employees=employees, weeks=weeks, seed=seed)
+
+    started = time.perf_counter()
+    stages = scheduler_stages(data, reader, repeat)
+    if weeks > 1:
+        stages.update(multi_week_stages(data, reader, repeat))
+    if include_api:
+        with isolated_environment():
+            stages.update(api_stages(data, weeks > 1, repeat))
+
+    result = {
+        'parameters': {
+            'employees': employees,
+            'weeks': weeks,
+            'repeat': repeat,
+            'reader': reader,
+            'seed': seed,
+            'workbook_bytes': len(data),
+        },
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'stages': stages,
+        'total_seconds': round(time.perf_counter() - started, 3),
+    }
+    if resource is not None:
+        # Linux 上单位为 KB
+        result['environment']['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
@@ -0,0 +1,102 @@
+"""生成合成的 "Duty Roster" 排班表工作簿
+
+布局与真实排班表相同：B1 为周信息，第 4 行为日期（"Monday 30/12"），
+从第 5 行开始 A 列为员工，每天占 开始/结束/任务 三列。
+为了接近真实文件，会混用不同的时间写法、字体、填充、边框和合并单元格，
+默认的起始日期让排班跨越年末。
+"""
+import io
+import random
+from datetime import date, time, timedelta
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+TASKS = ['Kitchen', 'Sushi Bar', 'Front', 'Delivery', 'Prep, Cleaning', '寿司', None]
+FILLS = ['FFF2CC', 'DDEBF7', 'E2EFDA', 'FCE4D6']
+THIN = Side(style='thin', color='999999')
+
+
+def default_start():
+    """今年 12 月 28 日所在周的周一，保证生成的排班跨年"""
+    year_end = date(date.today().year, 12, 28)
+    return year_end - timedelta(days=year_end.weekday())
+
+
+def _time_value(rng, hour, minute):
+    """随机选择一种时间写法：Excel 时间、"9:00"、"09:00:00" 或带空格的文本"""
+    style = rng.random()
+    if style < 0.55:
+        return time(hour, minute)
+    if style < 0.75:
+        return f'{hour}:{minute:02d}'
+    if style < 0.9:
+        return f'{hour:02d}:{minute:02d}:00'
+    return f' {hour}:{minute:02d} '
+
+
+def _fill_week(ws, rng, week_number, monday, employees):
+    ws['B1'] = f'[WEEK {week_number}]'
+    ws['B1'].font = Font(bold=True, size=14)
+    ws.merge_cells('B1:D1')
+    ws['B2'] = f'{monday:%d/%m/%Y} - {monday + timedelta(days=6):%d/%m/%Y}'
+    ws['A3'] = 'Duty Roster'
+    ws['A3'].font = Font(italic=True)
+
+    for day_index in range(7):
+        day = monday + timedelta(days=day_index)
+        column = 2 + day_index * 3
+        cell = ws.cell(row=4, column=column, value=f'{day:%A} {day.day}/{day.month}')
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+        for offset, label in enumerate(('Start', 'Finish', 'Task')):
+            ws.cell(row=3, column=column + offset, value=label).border = Border(bottom=THIN)
+
+    for index, name in enumerate(employees):
+        row = 5 + index
+        name_cell = ws.cell(row=row, column=1, value=name)
+        if index % 5 == 0:
+            name_cell.font = Font(bold=True, color='1F4E78')
+
+        for day_index in range(7):
+            column = 2 + day_index * 3
+            # 大约三分之一的班次为空，少量写成 OFF
+            roll = rng.random()
+            if roll < 0.3:
+                continue
+            if roll < 0.35:
+                ws.cell(row=row, column=column, value='OFF')
+                continue
+
+            start_hour = rng.choice([9, 10, 11, 12, 16, 17])
+            start_minute = rng.choice([0, 0, 30])
+            end_hour = min(start_hour + rng.randint(4, 9), 23)
+            start = ws.cell(row=row, column=column, value=_time_value(rng, start_hour, start_minute))
+            end = ws.cell(row=row, column=column + 1, value=_time_value(rng, end_hour, rng.choice([0, 30])))
+            for cell in (start, end):
+                if isinstance(cell.value, time):
+                    cell.number_format = 'h:mm'
+            task = rng.choice(TASKS)
+            if task is not None:
+                ws.cell(row=row, column=column + 2, value=task)
+            if rng.random() < 0.2:
+                fill = PatternFill('solid', fgColor=rng.choice(FILLS))
+                for offset in range(3):
+                    ws.cell(row=row, column=column + offset).fill = fill
+
+
+def build_roster_workbook(employees=30, weeks=1, start=None, seed=0):
+    """返回 xlsx 文件内容（bytes），每周一个工作表"""
+    rng = random.Random(seed)
+    start = start or default_start()
+    names = ['Lulu'] + [f'Employee {index}' for index in range(1, employees)]
+
+    wb = Workbook()
+    for week in range(weeks):
+        ws = wb.active if week == 0 else wb.create_sheet()
+        ws.title = f'Week {week + 1}'
+        _fill_week(ws, rng, week + 1, start + timedelta(days=7 * week), names[:employees])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
@@ -1 +1,12 @@
- 
\ No newline at end of file
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+application = get_asgi_application()
+
+# 启动时导入解析依赖并预热（CONVERTER_PRELOAD），配合 gunicorn --preload 时工作进程共享预热后的状态
+from converter.warmup import preload  # noqa: E402
+
+preload()
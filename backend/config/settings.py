@@ -30,6 +30,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'converter.middleware.TimingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -51,6 +52,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 DATABASES = {
     'default': {
@@ -131,4 +133,98 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # 确保media目录存在
-os.makedirs(MEDIA_ROOT, exist_ok=True)
\ No newline at end of file
+os.makedirs(MEDIA_ROOT, exist_ok=True)
+# 排班表解析缓存（按上传内容的 SHA-256 寻址）
+ROSTER_CACHE_MAX_ENTRIES = 32  # 最多缓存的排班表数量，超出后按 LRU 淘汰
+ROSTER_CACHE_TTL = 3600  # 缓存有效期（秒）
+ROSTER_READER = 'streaming'  # 'streaming'：openpyxl 只读逐行读取；'pandas'：pd.read_excel 整表读取
+ROSTER_SHEET_WORKERS = None  # 多工作表并行解析的进程数，None 表示 CPU 核数，1 表示不使用进程池
+ROSTER_TIME_ZONE = 'Pacific/Auckland'  # 排班表默认的时区，请求中可用 time_zone 参数覆盖
+# 排班表的资源限制：完整解析之前按 zip 中央目录和工作表的 dimension 预检查（见 converter/validation.py）
+ROSTER_MAX_ROWS = 2000  # 工作表已使用区域的最大行数
+ROSTER_MAX_COLUMNS = 200  # 工作表已使用区域的最大列数
+ROSTER_MAX_SHEETS = 60  # all_sheets 模式下最多的工作表数
+ROSTER_MAX_UNCOMPRESSED_MB = 50  # 工作簿解压后的总大小上限
+ROSTER_MAX_COMPRESSION_RATIO = 100  # 单个部件的最大压缩比，超过视为 zip 炸弹
+ROSTER_PARSE_TIMEOUT = 10  # 解析的时间上限（秒），None 表示不限制
+# 排班表布局（见 converter/layout.py）：'auto' 按表头自动识别（按模板指纹缓存）；
+# 也可以写出固定的布局，例如 {'date_row': 2, 'day_columns': [2, 6, 10, 14, 18, 22, 26], 'name_column': 1,
+# 'first_employee_row': 4, 'week_cells': [[0, 0]], 'start_offset': 0, 'end_offset': 1, 'task_offset': 3}，行列下标从 0 开始
+ROSTER_LAYOUT = 'auto'
+ICAL_SERIALIZER = 'fast'  # 'fast'：直接拼接 iCalendar 文本；'icalendar'：使用 icalendar 库的对象模型
+ICAL_INCLUDE_VTIMEZONE = False  # 仅 fast 序列化器：在日历中写出事件所用时区的 VTIMEZONE
+
+# 异步转换任务
+CONVERSION_JOB_WORKERS = 2  # 每个进程中执行转换任务的后台线程数
+CONVERSION_JOB_TTL = 86400  # 任务记录保留时间（秒）
+
+# 批量上传（/api/batch/）
+BATCH_UPLOAD_WORKERS = 4  # 同时处理的文件数（所有批量请求共用）
+BATCH_MAX_FILES = 20  # 一次请求最多的文件数
+
+# 启动预热（见 converter/warmup.py）：服务进程启动时导入 pandas / openpyxl 并用内存中的小排班表走一遍转换流程
+CONVERTER_PRELOAD = os.environ.get('CONVERTER_PRELOAD', '1') == '1'
+IMPORT_TIME_BUDGET_MS = 800  # manage.py check_import_time：加载 URL 配置（不含解析依赖）的导入时间上限
+
+# 上传接口的限流（见 converter/throttling.py）：按客户端 IP 的令牌桶，超出时返回 429 和 Retry-After
+UPLOAD_THROTTLE_RATE = os.environ.get('UPLOAD_THROTTLE_RATE', '30/min') or None  # 令牌的补充速度，设为空表示不限流
+UPLOAD_THROTTLE_BURST = 10  # 桶的容量，即允许连续上传的次数（批量上传每个文件算一次）
+UPLOAD_THROTTLE_CACHE = 'throttle'  # 保存令牌桶的缓存（见 CACHES）
+# 同时解析排班表的数量上限（每个进程，见 converter/concurrency.py），解析缓存命中的请求不占用名额
+PARSE_CONCURRENCY = 4
+PARSE_QUEUE_TIMEOUT = 5  # 等待名额的秒数，超时返回 503；异步任务和批量上传会一直等待
+PARSE_RETRY_AFTER = 5  # 503 响应中的 Retry-After（秒）
+
+# 限流计数只在本进程内使用，放在本地内存缓存中
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'upload-throttle',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+REST_FRAMEWORK = {
+    # DRF 的错误（包括限流）也返回 {'error': True, 'message': ...}
+    'EXCEPTION_HANDLER': 'converter.exceptions.exception_handler',
+    # 部署在反向代理之后时设置为代理的层数，限流才会按 X-Forwarded-For 中的客户端 IP 计数
+    'NUM_PROXIES': None,
+}
+
+# 异步视图中解析排班表使用的线程数
+ASYNC_CONVERTER_WORKERS = 4
+
+# 生成的 .ics 文件按内容哈希保存在 media/calendars，由 manage.py gc_calendars 定期清理
+ICS_STORE_MAX_AGE_DAYS = 30  # 超过该天数没有再生成过的文件会被删除
+ICS_STORE_MAX_SIZE_MB = 200  # 总大小上限，超出时从最久未生成的文件开始删除
+ICS_DOWNLOAD_MAX_AGE = 300  # 旧版本文件名（非内容寻址）的下载缓存时间（秒）
+ICS_COMPRESS_MIN_BYTES = 1024  # 超过该大小的日历按 Accept-Encoding 使用 gzip / br 压缩
+
+# 员工日历订阅源（/api/feeds/<token>.ics）的缓存时间（秒）
+FEED_MAX_AGE = 300
+
+# 日志：转换流程的调试信息默认关闭，排查问题时设置环境变量 CONVERTER_LOG_LEVEL=DEBUG
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'converter': {
+            'handlers': ['console'],
+            'level': os.environ.get('CONVERTER_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# 各阶段耗时：API 响应带 Server-Timing 头；METRICS_ENABLED 时 /api/metrics/ 输出 Prometheus 格式的直方图
+SERVER_TIMING_ENABLED = True
+METRICS_ENABLED = False
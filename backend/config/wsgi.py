@@ -4,4 +4,9 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_wsgi_application() 
\ No newline at end of file
+application = get_wsgi_application()
+
+# 启动时导入解析依赖并预热（CONVERTER_PRELOAD），配合 gunicorn --preload 时工作进程共享预热后的状态
+from converter.warmup import preload  # noqa: E402
+
+preload()
@@ -0,0 +1,178 @@
+"""employees / convert / download 接口的原生异步版本，配合 ASGI 服务器使用
+
+请求线程只负责收发数据：Excel 解析和日历生成在线程池中执行，
+文件读写也放到线程池里，单个进程可以同时保持大量慢速上传连接。
+"""
+import asyncio
+import contextvars
+import functools
+import math
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+from .downloads import calendar_download_response
+from .services import (
+    ConversionError,
+    convert_upload,
+    download_filename,
+    is_truthy,
+    list_employees,
+    resolve_download_path,
+)
+from .throttling import UploadRateThrottle, throttled_message
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ASYNC_CONVERTER_WORKERS', 4),
+                thread_name_prefix='async-converter',
+            )
+        return _executor
+
+
+async def _run_blocking(func, *args, **kwargs):
+    """把阻塞的解析或文件读写交给线程池执行"""
+    loop = asyncio.get_running_loop()
+    # 复制当前上下文，线程中记录的阶段耗时才能归到本次请求
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), lambda: context.run(func, *args, **kwargs))
+
+
+def async_api_view(*methods):
+    """异步视图装饰器：限制请求方法，并与 DRF 的 APIView 一样免除 CSRF 检查
+
+    Django 4.2 自带的 csrf_exempt / require_http_methods 会把协程函数包装成同步视图，这里不能使用。
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view(request, *args, **kwargs)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def _error(message, status_code, detail=None, headers=None):
+    payload = {
+        'error': True,
+        'message': message
+    }
+    if detail is not None:
+        payload['detail'] = detail
+    return JsonResponse(payload, status=status_code, headers=headers)
+
+
+def _throttle(request):
+    """与同步接口相同的上传限流，超出时返回 429 响应，否则返回 None"""
+    throttle = UploadRateThrottle()
+    if throttle.allow_request(request, None):
+        return None
+    wait = math.ceil(throttle.wait())
+    return _error(throttled_message(wait), 429, headers={'Retry-After': str(wait)})
+
+
+async def _get_upload(request):
+    """解析 multipart 请求体（同步操作，放到线程中），返回 (文件, 表单, 错误响应)"""
+    files, data = await sync_to_async(lambda: (request.FILES, request.POST), thread_sensitive=False)()
+
+    # 检查是否有文件上传
+    if 'file' not in files:
+        return None, data, _error('没有上传文件', 400)
+
+    excel_file = files['file']
+
+    # 检查文件类型
+    if not excel_file.name.endswith(('.xlsx', '.xls')):
+        return None, data, _error('请上传Excel文件（.xlsx或.xls格式）', 400)
+
+    return excel_file, data, None
+
+
+@async_api_view('POST')
+async def get_employees(request):
+    throttled = _throttle(request)
+    if throttled is not None:
+        return throttled
+
+    excel_file, data, error = await _get_upload(request)
+    if error is not None:
+        return error
+
+    try:
+        employees = await _run_blocking(list_employees, excel_file, all_sheets=is_truthy(data.get('all_sheets', '')))
+    except ConversionError as e:
+        return _error(e.message, e.status_code, headers=e.headers)
+    except Exception as e:
+        return _error(f'处理文件时出错: {str(e)}', 500, traceback.format_exc())
+
+    return JsonResponse({
+        'error': False,
+        'employees': employees
+    })
+
+
+@async_api_view('POST')
+async def convert_excel(request):
+    throttled = _throttle(request)
+    if throttled is not None:
+        return throttled
+
+    excel_file, data, error = await _get_upload(request)
+    if error is not None:
+        return error
+
+    if 'employee_name' not in data:
+        return _error('请选择员工', 400)
+
+    try:
+        result = await _run_blocking(
+            convert_upload,
+            excel_file,
+            data['employee_name'],
+            all_sheets=is_truthy(data.get('all_sheets', '')),
+            time_zone=data.get('time_zone'),
+            delta=is_truthy(data.get('delta', '')),
+        )
+    except ConversionError as e:
+        return _error(e.message, e.status_code, headers=e.headers)
+    except Exception as e:
+        return _error(f'处理文件时出错: {str(e)}', 500, traceback.format_exc())
+
+    return JsonResponse({
+        'error': False,
+        'message': '转换成功',
+        **result
+    })
+
+
+@async_api_view('GET', 'HEAD')
+async def download_ical(request, filename):
+    try:
+        file_path = await _run_blocking(resolve_download_path, filename)
+        if file_path is None:
+            return _error('文件不存在', 404)
+
+        # 读取文件、计算 ETag 和压缩都在线程池中进行
+        return await _run_blocking(
+            calendar_download_response,
+            request,
+            file_path,
+            filename,
+            download_filename(filename, request.GET.get('name')),
+        )
+    except Exception as e:
+        return _error(f'下载文件时出错: {str(e)}', 500, traceback.format_exc())
@@ -0,0 +1,95 @@
+"""一次上传多个排班表
+
+各文件在有界的线程池中并行解析（与单文件接口相同的 load_scheduler 流程，
+也共用解析缓存），每完成一个文件就输出一行 JSON（NDJSON），
+前端可以边接收边显示进度，总耗时接近最慢的那个文件。
+"""
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connection
+
+from .concurrency import queue_parses
+from .instrumentation import finish_request_timer, start_request_timer
+from .services import ConversionError, convert_upload, inspect_upload
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """批量上传共用一个线程池，同时处理的文件数不超过 BATCH_UPLOAD_WORKERS"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BATCH_UPLOAD_WORKERS', 4),
+                thread_name_prefix='batch-upload',
+            )
+        return _executor
+
+
+def process_file(index, excel_file, employee_name=None, all_sheets=False, time_zone=None):
+    """处理批量上传中的一个文件，返回该文件的结果（失败时 error 为 True）"""
+    result = {'index': index, 'filename': excel_file.name}
+    started = time.perf_counter()
+    timer, token = start_request_timer()
+    try:
+        if not excel_file.name.endswith(('.xlsx', '.xls')):
+            raise ConversionError('请上传Excel文件（.xlsx或.xls格式）')
+
+        # 批量上传的线程池本身有界，解析名额已满时排队等待
+        with queue_parses():
+            result.update(inspect_upload(excel_file, all_sheets=all_sheets))
+            if employee_name:
+                # 解析结果已经写入缓存，这里不会再次读取Excel
+                result.update(convert_upload(excel_file, employee_name, all_sheets=all_sheets, time_zone=time_zone))
+        result.update({'error': False, 'message': '处理成功'})
+    except ConversionError as e:
+        result.update({'error': True, 'message': e.message})
+    except Exception as e:
+        result.update({'error': True, 'message': f'处理文件时出错: {str(e)}', 'detail': traceback.format_exc()})
+    finally:
+        finish_request_timer(token)
+        # 线程池中的线程不经过请求周期，需要自己关闭数据库连接
+        connection.close()
+
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    result['stages'] = {name: round(seconds * 1000, 1) for name, seconds in timer.stages.items()}
+    return result
+
+
+def _line(payload):
+    return json.dumps(payload, ensure_ascii=False, default=str) + '\n'
+
+
+def stream_batch(files, employee_name=None, all_sheets=False, time_zone=None):
+    """按完成顺序逐行输出每个文件的结果，最后一行为汇总"""
+    started = time.perf_counter()
+    executor = _get_executor()
+    futures = [
+        executor.submit(process_file, index, excel_file, employee_name, all_sheets, time_zone)
+        for index, excel_file in enumerate(files)
+    ]
+
+    failed = 0
+    try:
+        for future in as_completed(futures):
+            result = future.result()
+            failed += result['error']
+            yield _line(result)
+    finally:
+        # 客户端提前断开时，取消还没有开始的文件
+        for future in futures:
+            future.cancel()
+
+    yield _line({
+        'done': True,
+        'total': len(futures),
+        'failed': failed,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
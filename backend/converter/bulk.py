@@ -0,0 +1,227 @@
+"""批量转换磁盘上的排班表（manage.py convert_rosters）
+
+每个排班表在进程池中独立转换，输出到 <输出目录>/<排班表文件名>/schedule_<员工>.ics。
+清单文件（manifest）记录每个输入的修改时间、大小、SHA-256 和转换选项：
+修改时间和大小都没变时直接跳过；变了但内容哈希相同（例如重新复制到共享盘）也跳过，
+只更新清单。命令行转换不写数据库（不更新订阅源和历史记录）。
+"""
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.utils.text import get_valid_filename
+
+from .ical import ShiftScheduler
+from .names import calendar_file_names, numbered_names
+from .validation import WorkbookRejected, validate_workbook
+from .warmup import import_parsers
+from .workbook import MultiWeekScheduler
+
+ROSTER_EXTENSIONS = ('.xlsx', '.xls')
+MANIFEST_VERSION = 1
+
+
+def find_rosters(patterns, recursive=False):
+    """展开目录和通配符，返回排好序的排班表路径（跳过 Excel 的 ~$ 临时文件）"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '**', '*') if recursive else os.path.join(pattern, '*')
+        for path in glob.glob(pattern, recursive=True):
+            name = os.path.basename(path)
+            if os.path.isfile(path) and name.lower().endswith(ROSTER_EXTENSIONS) and not name.startswith('~$'):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_names(paths):
+    """每个排班表的输出子目录名；不同目录下的同名文件依次加上 -2、-3"""
+    stems = [get_valid_filename(os.path.splitext(os.path.basename(path))[0]) or 'roster' for path in paths]
+    return dict(zip(paths, numbered_names(stems, separator='-')))
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def save_manifest(path, files):
+    """先写临时文件再替换，cron 中途被终止也不会留下半个清单"""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f, ensure_ascii=False, indent=2)
+    os.replace(temporary, path)
+
+
+def _reusable(entry, options_key):
+    """清单中的记录使用相同的转换选项，且输出文件都还在"""
+    return (
+        entry is not None
+        and entry.get('options') == options_key
+        and all(os.path.exists(output) for output in entry.get('outputs', []))
+    )
+
+
+def convert_roster(path, output_dir, employee=None, all_sheets=False, time_zone=None,
+                   serializer='fast', include_vtimezone=False, limits=None, layout=None):
+    """转换一个排班表（在子进程中运行），返回该文件的结果
+
+    employee 为 None 时为所有员工生成日历，否则只生成匹配的那一位。
+    layout 为配置的表格布局，None 表示自动识别。
+    """
+    started = time.perf_counter()
+    result = {'path': path, 'outputs': []}
+    try:
+        validate_workbook(path, all_sheets=all_sheets, limits=limits, layout=layout)
+        if all_sheets:
+            # 外层已经按文件并行，工作表在同一进程中顺序解析
+            scheduler = MultiWeekScheduler(path, max_workers=1)
+        else:
+            scheduler = ShiftScheduler(path)
+        scheduler.limits = limits
+        scheduler.layout = layout
+        if not scheduler.read_excel():
+            raise WorkbookRejected('无法读取Excel文件，请检查文件格式')
+        if not scheduler.get_week_info() or not scheduler.get_days_info():
+            raise WorkbookRejected('无法获取周信息或日期信息，请检查Excel文件格式')
+
+        scheduler.set_output(serializer, include_vtimezone)
+        if time_zone:
+            scheduler.set_time_zone(time_zone)
+
+        employees = scheduler.get_employees()
+        if employee is not None:
+            key = scheduler.find_employee_row(employee)
+            if key is None:
+                result.update({'status': 'no_match', 'message': f'未找到员工 {employee}'})
+                return result
+            employees = [item for item in employees if scheduler.employee_key(item) == key]
+
+        os.makedirs(output_dir, exist_ok=True)
+        for item, name in zip(employees, calendar_file_names(employees)):
+            output = os.path.join(output_dir, f'{name}.ics')
+            if not scheduler.save_calendar(scheduler.create_calendar(scheduler.employee_key(item)), output):
+                raise OSError(f'无法写入 {output}')
+            result['outputs'].append(output)
+
+        result.update({
+            'status': 'converted',
+            'week_info': scheduler.week_info,
+            'employees': [item.name for item in employees],
+        })
+    except WorkbookRejected as e:
+        result.update({'status': 'failed', 'message': e.message})
+    except TimeoutError:
+        result.update({'status': 'failed', 'message': '解析排班表超时'})
+    except Exception as e:
+        result.update({'status': 'failed', 'message': f'处理文件时出错: {str(e)}'})
+    finally:
+        result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def convert_rosters(paths, output_dir, employee=None, all_sheets=False, time_zone=None, workers=None,
+                    manifest_path=None, force=False, serializer='fast', include_vtimezone=False, limits=None,
+                    layout=None, progress=None):
+    """转换多个排班表，返回汇总（每个文件的结果和各状态的数量）
+
+    progress 为可选的回调，每完成一个文件调用一次。
+    """
+    started = time.perf_counter()
+    options_key = {
+        'employee': employee,
+        'all_sheets': all_sheets,
+        'time_zone': time_zone,
+        'layout': 'auto' if layout is None else layout.as_dict(),
+    }
+    manifest_path = manifest_path or os.path.join(output_dir, '.manifest.json')
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(manifest_path)
+    directories = output_names(paths)
+
+    results, pending = [], []
+    for path in paths:
+        stat = os.stat(path)
+        entry = manifest.get(path)
+        if _reusable(entry, options_key):
+            if (entry.get('mtime_ns'), entry.get('size')) == (stat.st_mtime_ns, stat.st_size):
+                results.append({'path': path, 'status': 'skipped', 'outputs': entry['outputs']})
+                continue
+            content_hash = file_hash(path)
+            if entry.get('sha256') == content_hash:
+                # 只是修改时间变了，内容相同
+                manifest[path] = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                results.append({'path': path, 'status': 'skipped', 'outputs': entry['outputs']})
+                continue
+        else:
+            content_hash = file_hash(path)
+        pending.append((path, stat, content_hash))
+
+    for result in results:
+        if progress is not None:
+            progress(result)
+
+    def record(result, stat, content_hash):
+        if result['status'] in ('converted', 'no_match'):
+            manifest[result['path']] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'sha256': content_hash,
+                'options': options_key,
+                'outputs': result['outputs'],
+            }
+        else:
+            manifest.pop(result['path'], None)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    arguments = (employee, all_sheets, time_zone, serializer, include_vtimezone, limits, layout)
+    try:
+        if workers == 1 or len(pending) <= 1:
+            for path, stat, content_hash in pending:
+                record(convert_roster(path, os.path.join(output_dir, directories[path]), *arguments), stat, content_hash)
+        else:
+            import_parsers()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(convert_roster, path, os.path.join(output_dir, directories[path]), *arguments):
+                        (stat, content_hash)
+                    for path, stat, content_hash in pending
+                }
+                for future in as_completed(futures):
+                    record(future.result(), *futures[future])
+    finally:
+        # 中途失败或被中断时，已完成的文件也记入清单
+        save_manifest(manifest_path, manifest)
+
+    results.sort(key=lambda item: item['path'])
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return {
+        'output_dir': os.path.abspath(output_dir),
+        'manifest': os.path.abspath(manifest_path),
+        'options': options_key,
+        'total': len(results),
+        'counts': counts,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'files': results,
+    }
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def hash_upload(uploaded_file):
+    """计算上传文件内容的 SHA-256，用作缓存键"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RosterCache:
+    """按内容哈希寻址的排班表解析结果缓存（LRU + TTL）
+
+    保存已解析的表格数据以及 week_info / days_info / 员工列表，
+    同一份文件再次上传（或先获取员工再转换）时可以完全跳过 Excel 解析。
+    """
+
+    def __init__(self, max_entries=32, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            stored_at, value = item
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not key or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+roster_cache = RosterCache(
+    max_entries=getattr(settings, 'ROSTER_CACHE_MAX_ENTRIES', 32),
+    ttl=getattr(settings, 'ROSTER_CACHE_TTL', 3600),
+)
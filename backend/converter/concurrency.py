@@ -0,0 +1,66 @@
+"""排班表解析的并发上限
+
+读取和解析 Excel 占用 CPU（pandas / openpyxl），同时解析的数量超过核数只会让每个请求都变慢。
+进程内用一个有界信号量限制同时解析的数量（PARSE_CONCURRENCY），只有解析缓存未命中的请求才占用名额。
+
+交互式请求最多排队 PARSE_QUEUE_TIMEOUT 秒，仍没有名额时返回 503 和 Retry-After；
+异步转换任务和批量上传本来就在有界的线程池中运行，用 queue_parses() 一直等待。
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .instrumentation import stage
+
+_slots = None
+_slots_lock = threading.Lock()
+
+# 当前上下文中等待名额的秒数：未设置时使用 PARSE_QUEUE_TIMEOUT，None 表示一直等待
+_UNSET = object()
+_queue_timeout = contextvars.ContextVar('parse_queue_timeout', default=_UNSET)
+
+
+class ParserBusy(Exception):
+    """等待解析名额超时"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'解析名额已满，{retry_after} 秒后重试')
+        self.retry_after = retry_after
+
+
+def _get_slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(getattr(settings, 'PARSE_CONCURRENCY', 4))
+        return _slots
+
+
+@contextmanager
+def queue_parses(timeout=None):
+    """在该上下文中等待解析名额最多 timeout 秒（None 表示一直等待）"""
+    token = _queue_timeout.set(timeout)
+    try:
+        yield
+    finally:
+        _queue_timeout.reset(token)
+
+
+@contextmanager
+def parse_slot():
+    """占用一个解析名额，排队超时时抛出 ParserBusy"""
+    timeout = _queue_timeout.get()
+    if timeout is _UNSET:
+        timeout = getattr(settings, 'PARSE_QUEUE_TIMEOUT', 5)
+
+    slots = _get_slots()
+    with stage('queue'):
+        acquired = slots.acquire(timeout=timeout)
+    if not acquired:
+        raise ParserBusy(getattr(settings, 'PARSE_RETRY_AFTER', 5))
+    try:
+        yield
+    finally:
+        slots.release()
@@ -0,0 +1,121 @@
+"""日历下载的 HTTP 缓存：强 ETag、Last-Modified、304 响应和压缩协商
+
+订阅下载链接的日历客户端会不断轮询，内容没有变化时只返回响应头。
+"""
+import gzip
+import hashlib
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .cache import RosterCache
+from .store import is_store_name
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只使用 gzip
+    brotli = None
+
+# 按 (路径, 修改时间, 大小) 缓存文件内容的哈希和压缩结果
+_representations = RosterCache(max_entries=256, ttl=3600)
+
+
+def _compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content)
+    return gzip.compress(content, mtime=0)
+
+
+def _accepted_encodings(request):
+    """解析 Accept-Encoding，返回客户端接受的编码集合（忽略 q=0）"""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _choose_encoding(request, size):
+    if size < getattr(settings, 'ICS_COMPRESS_MIN_BYTES', 1024):
+        return None
+    accepted = _accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def _representation(file_path, filename, stat, encoding):
+    """返回 (ETag, 响应内容)，同一文件版本的结果会被缓存"""
+    key = (file_path, stat.st_mtime_ns, stat.st_size, encoding)
+    cached = _representations.get(key)
+    if cached is not None:
+        return cached
+
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    # 内容寻址的文件名本身就是内容哈希
+    digest = filename[:-4] if is_store_name(filename) else hashlib.sha256(content).hexdigest()
+    if encoding is not None:
+        digest = f'{digest}-{encoding}'
+        content = _compress(content, encoding)
+
+    result = (f'"{digest}"', content)
+    _representations.set(key, result)
+    return result
+
+
+def _respond(request, etag, last_modified, encoding, content, download_name, cache_control):
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(content(), content_type='text/calendar')
+        response['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def calendar_download_response(request, file_path, filename, download_name):
+    """生成支持条件请求的日历下载响应"""
+    stat = os.stat(file_path)
+    encoding = _choose_encoding(request, stat.st_size)
+    etag, content = _representation(file_path, filename, stat, encoding)
+
+    if is_store_name(filename):
+        # 内容寻址的文件永远不会变化
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = f'public, max-age={getattr(settings, "ICS_DOWNLOAD_MAX_AGE", 300)}'
+
+    return _respond(request, etag, int(stat.st_mtime), encoding, lambda: content, download_name, cache_control)
+
+
+def calendar_content_response(request, content, digest, last_modified, download_name, cache_control):
+    """内存中的日历内容（例如订阅源）的条件请求响应，digest 为内容哈希"""
+    encoding = _choose_encoding(request, len(content))
+
+    def encoded():
+        if encoding is None:
+            return content
+        key = (digest, encoding)
+        cached = _representations.get(key)
+        if cached is None:
+            cached = _compress(content, encoding)
+            _representations.set(key, cached)
+        return cached
+
+    etag = f'"{digest}-{encoding}"' if encoding is not None else f'"{digest}"'
+    return _respond(request, etag, last_modified, encoding, encoded, download_name, cache_control)
@@ -0,0 +1,28 @@
+"""DRF 的异常处理（REST_FRAMEWORK['EXCEPTION_HANDLER']）
+
+DRF 自己抛出的异常（限流、请求体解析失败、方法不允许等）也使用与视图相同的
+{'error': True, 'message': ...} 格式；Retry-After 等响应头保持 DRF 的设置不变。
+"""
+from rest_framework.exceptions import Throttled
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .throttling import throttled_message
+
+
+def exception_handler(exc, context):
+    response = drf_exception_handler(exc, context)
+    if response is None:
+        return None
+
+    if isinstance(exc, Throttled):
+        message = throttled_message(exc.wait)
+    elif isinstance(response.data, dict) and 'detail' in response.data:
+        message = str(response.data['detail'])
+    else:
+        message = str(exc)
+
+    response.data = {
+        'error': True,
+        'message': message
+    }
+    return response
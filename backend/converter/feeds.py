@@ -0,0 +1,102 @@
+"""员工日历订阅源
+
+每次转换都会把该员工涉及的周写入数据库（每周一段已序列化的 VEVENT），
+内容没有变化的周不会重写。订阅源在第一次被请求时拼接并缓存，
+直到新的上传改变了其中某一周。
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils import timezone
+
+from .ical import new_calendar
+from .models import EmployeeFeed, FeedWeek
+from .names import normalize_name
+from .transactions import write_transaction
+
+_CALENDAR_END = b'END:VCALENDAR\r\n'
+
+
+def feed_url(feed):
+    return f'/api/feeds/{feed.token}.ics'
+
+
+def publish_schedule(scheduler, employee_row, stamps=None):
+    """把本次上传中该员工的各周排班写入订阅源，返回 EmployeeFeed
+
+    订阅源按表中员工名字规范化后的结果区分，请求中写成 "lulu"、"Lul" 的转换
+    都更新 Lulu 的同一个订阅源。
+    stamps 为已签发事件的 {uid: (dtstamp, sequence)}，
+    内容没有变化的周序列化结果不变，不会重写。
+    """
+    employee_name = scheduler.employee_name_at(employee_row)
+    weeks = []
+    for week, row in scheduler.iter_employee_weeks(employee_row):
+        week_start = week.week_start()
+        if week_start is None:
+            continue
+        events = week.render_events(row, stamps)
+        weeks.append((week_start, events, hashlib.sha256(events).hexdigest()))
+
+    with write_transaction():
+        feed, _ = EmployeeFeed.objects.get_or_create(
+            employee_key=normalize_name(employee_name),
+            defaults={'employee_name': employee_name},
+        )
+        existing = {
+            week.week_start: week.content_hash
+            for week in feed.weeks.filter(week_start__in=[week_start for week_start, _, _ in weeks]).only('week_start', 'content_hash')
+        }
+
+        # 显示的名字（日历名称）随表中的写法更新
+        changed = feed.employee_name != employee_name
+        for week_start, events, content_hash in weeks:
+            if existing.get(week_start) == content_hash:
+                continue
+            FeedWeek.objects.update_or_create(
+                feed=feed,
+                week_start=week_start,
+                defaults={'events': events, 'content_hash': content_hash},
+            )
+            changed = True
+
+        if changed:
+            # 清空渲染缓存，下一次请求时重新拼接
+            EmployeeFeed.objects.filter(pk=feed.pk).update(
+                employee_name=employee_name, rendered=None, rendered_hash='', updated_at=timezone.now(),
+            )
+            feed.refresh_from_db()
+
+    return feed
+
+
+def publish_all_schedules(scheduler, stamps=None):
+    """更新排班表中所有员工的订阅源，返回 {员工名: 订阅链接}
+
+    stamps 为 {员工名: {uid: (dtstamp, sequence)}}
+    """
+    stamps = stamps or {}
+    return {
+        employee.name: feed_url(publish_schedule(
+            scheduler, scheduler.employee_key(employee), stamps.get(employee.name),
+        ))
+        for employee in scheduler.get_employees()
+    }
+
+
+def render_feed(feed):
+    """返回订阅源的 (内容, SHA-256)，有缓存时直接使用"""
+    if feed.rendered is not None and feed.rendered_hash:
+        return bytes(feed.rendered), feed.rendered_hash
+
+    cal = new_calendar(getattr(settings, 'ICAL_SERIALIZER', 'fast'))
+    cal.add('x-wr-calname', f'{feed.employee_name} Shift Schedule')
+    header = cal.to_ical()[:-len(_CALENDAR_END)]
+
+    events = [bytes(week.events) for week in feed.weeks.order_by('week_start')]
+    content = header + b''.join(events) + _CALENDAR_END
+    digest = hashlib.sha256(content).hexdigest()
+
+    # 渲染期间如果有新的上传（updated_at 已变化），不覆盖新清空的缓存
+    EmployeeFeed.objects.filter(pk=feed.pk, updated_at=feed.updated_at).update(rendered=content, rendered_hash=digest)
+    return content, digest
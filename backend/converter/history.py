@@ -0,0 +1,162 @@
+"""排班历史
+
+每次转换都会按周记录处理过的排班表（文件哈希、日期范围、员工和班次），
+用途有两个：
+
+- 新上传的排班表推断年份时，以历史中的周作为参考日期；
+- 比较同一周的两次上传，得到新增、删除和修改的班次。
+"""
+
+from django.db import IntegrityError, transaction
+
+from .models import RosterWeek
+from .records import format_minutes
+from .workbook import scheduler_weeks
+
+# 推断年份时最多参考的历史周数（约五年）
+ANCHOR_LIMIT = 260
+
+
+def anchor_dates(limit=ANCHOR_LIMIT):
+    """历史记录中最近的若干个周开始日期"""
+    return list(
+        RosterWeek.objects.order_by('-week_start').values_list('week_start', flat=True).distinct()[:limit]
+    )
+
+
+def week_summary(week):
+    """一周排班的摘要：日期范围、员工、班次数和班次列表；无法确定日期时返回 None"""
+    dates = [day_info.to_date() for day_info in week.days_info]
+    known = [value for value in dates if value is not None]
+    if not known:
+        return None
+
+    employees = week.get_employees()
+    if week.shifts is None:
+        week.shifts = week.extract_shifts()
+
+    names = {employee.row: employee.name for employee in employees}
+    shifts = {name: [] for name in names.values()}
+    for row, items in week.shifts.items():
+        name = names.get(row)
+        if name is None:
+            continue
+        for shift in items:
+            day = dates[shift.day_index]
+            if day is not None:
+                shifts[name].append([day.isoformat(), shift.start, shift.end, shift.task])
+
+    return {
+        'week_start': min(known),
+        'week_end': max(known),
+        'employees': list(shifts),
+        'shift_counts': {name: len(items) for name, items in shifts.items()},
+        'shifts': shifts,
+    }
+
+
+def record_roster(scheduler):
+    """把排班表中的每一周写入历史，同一文件的同一周只记录一次"""
+    content_hash = scheduler.content_hash
+    if not content_hash:
+        return []
+
+    existing = set(RosterWeek.objects.filter(content_hash=content_hash).values_list('week_start', flat=True))
+    created = []
+    for week in scheduler_weeks(scheduler):
+        summary = week_summary(week)
+        if summary is None or summary['week_start'] in existing:
+            continue
+        try:
+            with transaction.atomic():
+                created.append(RosterWeek.objects.create(
+                    content_hash=content_hash,
+                    sheet_name=week.sheet_name or '',
+                    week_info=(week.week_info or '')[:255],
+                    **summary,
+                ))
+        except IntegrityError:
+            # 同一文件的并发请求已经写入
+            continue
+        existing.add(summary['week_start'])
+    return created
+
+
+def shift_slots(shifts):
+    """[[日期, 开始, 结束, 任务]] -> {(日期, 序号): 班次}，同一天的多个班次按顺序编号"""
+    slots = {}
+    counts = {}
+    for day, start, end, task in shifts:
+        slot = counts.get(day, 0)
+        counts[day] = slot + 1
+        slots[(day, slot)] = (start, end, task)
+    return slots
+
+
+def _describe(day, slot, shift):
+    start, end, task = shift
+    return {
+        'date': day,
+        'slot': slot,
+        'start_time': format_minutes(start),
+        'end_time': format_minutes(end),
+        'task': task,
+    }
+
+
+def diff_shifts(before, after):
+    """比较同一员工一周内的班次，没有变化时返回 None"""
+    old, new = shift_slots(before), shift_slots(after)
+    added = [_describe(*key, new[key]) for key in new if key not in old]
+    removed = [_describe(*key, old[key]) for key in old if key not in new]
+    changed = [
+        {'date': key[0], 'slot': key[1], 'before': _describe(*key, old[key]), 'after': _describe(*key, new[key])}
+        for key in new
+        if key in old and tuple(old[key]) != tuple(new[key])
+    ]
+    if not (added or removed or changed):
+        return None
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def diff_week(summary, previous):
+    """一周的差异；previous 为该周上一次上传的 RosterWeek，没有时所有班次都算新增"""
+    before = previous.shifts if previous is not None else {}
+    after = summary['shifts']
+
+    changes = {}
+    for name in list(after) + [name for name in before if name not in after]:
+        difference = diff_shifts(before.get(name, []), after.get(name, []))
+        if difference is not None:
+            changes[name] = difference
+
+    return {
+        'week_start': summary['week_start'].isoformat(),
+        'week_end': summary['week_end'].isoformat(),
+        'previous': None if previous is None else {
+            'content_hash': previous.content_hash,
+            'uploaded_at': previous.uploaded_at.isoformat(),
+        },
+        'employees_added': [name for name in after if name not in before] if previous is not None else [],
+        'employees_removed': [name for name in before if name not in after],
+        'changes': changes,
+    }
+
+
+def diff_roster(scheduler):
+    """与每一周最近一次内容不同的上传比较，返回每周的差异列表"""
+    weeks = []
+    for week in scheduler_weeks(scheduler):
+        summary = week_summary(week)
+        if summary is None:
+            continue
+        previous = (
+            RosterWeek.objects
+            .filter(week_start=summary['week_start'])
+            .exclude(content_hash=scheduler.content_hash or '')
+            .first()
+        )
+        entry = diff_week(summary, previous)
+        entry['week_info'] = week.week_info
+        weeks.append(entry)
+    return weeks
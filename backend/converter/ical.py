@@ -1,207 +1,471 @@
+import hashlib
+import logging
 import os
-import pandas as pd
-from datetime import datetime, timedelta
-import re
-from icalendar import Calendar, Event
-import pytz
+from datetime import datetime, timezone
 import sys
+import time
+
+try:
+    from .layout import DAY_PATTERN, HEADER_SCAN_COLUMNS, HEADER_SCAN_ROWS, resolve_layout
+    from .names import EmployeeIndex, normalize_name
+    from .records import Day, Employee, Shift
+    from .readers import portable_source, read_roster_pandas, read_roster_streaming
+    from .serializer import FastCalendar
+    from .timezones import DEFAULT_TIME_ZONE, get_zone, week_offset_table
+    from .workers import get_parse_workers
+    from .years import infer_years
+except ImportError:  # 作为脚本直接运行时
+    from layout import DAY_PATTERN, HEADER_SCAN_COLUMNS, HEADER_SCAN_ROWS, resolve_layout
+    from names import EmployeeIndex, normalize_name
+    from records import Day, Employee, Shift
+    from readers import portable_source, read_roster_pandas, read_roster_streaming
+    from serializer import FastCalendar
+    from timezones import DEFAULT_TIME_ZONE, get_zone, week_offset_table
+    from workers import get_parse_workers
+    from years import infer_years
+
+logger = logging.getLogger(__name__)
+
+def _trim_seconds(times):
+    """统一时间格式（去除秒）"""
+    parts = times.str.split(':')
+    has_colon = times.str.contains(':', regex=False)
+    return times.where(~has_colon, parts.str[0] + ':' + parts.str[1])
+
+def _parse_minutes(times):
+    """把 "HH:MM" 解析为从零点起的分钟数，无法解析的记为缺失值"""
+    parts = times.str.extract(r'^\s*(\d+)\s*:\s*(\d+)\s*$').astype(float)
+    hours, minutes = parts[0], parts[1]
+    in_range = (hours < 24) & (minutes < 60)
+    return (hours * 60 + minutes).where(in_range).astype('Int64')
+
+PRODID = '-//Sushi Restaurant Shift Schedule//EN'
+
+UID_DOMAIN = 'sushi-roster'
+
+def new_calendar(serializer='icalendar', include_vtimezone=False, method=None):
+    """创建空日历
+
+    serializer='fast' 时使用直接拼接文本的 FastCalendar，输出与 icalendar 相同；
+    include_vtimezone 只对 fast 生效，会为事件用到的时区写出 VTIMEZONE。
+    method 为 PUBLISH / CANCEL 时写出 METHOD 属性（增量更新）。
+    """
+    if serializer == 'fast':
+        cal = FastCalendar(PRODID, include_vtimezone=include_vtimezone)
+    else:
+        from icalendar import Calendar
+
+        cal = Calendar()
+        cal.add('prodid', PRODID)
+        cal.add('version', '2.0')
+    if method:
+        cal.add('method', method)
+    return cal
+
+def add_event(cal, summary, start, end, description=None, **extra):
+    """向任一种日历添加事件，extra 为 uid / dtstamp / sequence / status 等属性"""
+    if isinstance(cal, FastCalendar):
+        cal.add_event(summary, start, end, description, **extra)
+        return
+    from icalendar import Event
+
+    event = Event()
+    event.add('summary', summary)
+    event.add('dtstart', start)
+    event.add('dtend', end)
+    if description is not None:
+        event.add('description', description)
+    for name, value in extra.items():
+        event.add(name, value)
+    cal.add_component(event)
+
+def event_uid(employee_name, day, slot):
+    """由（员工, 日期, 当天第几个班次）确定的 UID，重新导入时日历应用会更新而不是重复添加"""
+    key = f'{normalize_name(employee_name)}|{day.isoformat()}|{slot}'
+    return f'{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}@{UID_DOMAIN}'
+
+def event_hash(summary, start, end, description):
+    """事件内容的哈希，用于判断再次签发时是否需要增加 SEQUENCE"""
+    content = '\n'.join((summary, start.isoformat(), end.isoformat(), str(start.tzinfo), description))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def calendar_events(cal):
+    """只序列化日历中的 VEVENT 部分"""
+    if isinstance(cal, FastCalendar):
+        return cal.events_ical()
+    return b''.join(event.to_ical() for event in cal.subcomponents)
 
 class ShiftScheduler:
-    def __init__(self, file_path):
-        self.file_path = file_path
+    def __init__(self, file_path, reader='streaming', sheet_name=None, serializer='icalendar'):
+        self.file_path = file_path  # 文件路径，也可以是字节内容或文件对象
+        self.reader = reader  # 'streaming'：只读逐行读取；'pandas'：pd.read_excel 整表读取
+        self.sheet_name = sheet_name  # 为 None 时读取第一个工作表
+        self.serializer = serializer  # 'icalendar' 或 'fast'，见 new_calendar()
+        self.include_vtimezone = False
         self.df = None
         self.week_info = None
         self.days_info = []
-        self.timezone = pytz.timezone('Pacific/Auckland')
-        self.debug = True  # 添加调试模式
+        self.employees = None
+        self.employee_index = None  # 员工名字索引，见 get_employee_index()
+        self.shifts = None  # extract_shifts() 的结果：{员工行: (Shift, ...)}
+        self.content_hash = None  # 上传内容的 SHA-256，用于解析结果缓存
+        self.time_zone = DEFAULT_TIME_ZONE  # 事件使用的时区（IANA 名称）
+        self.anchor_dates = ()  # 推断年份时参考的已知日期（例如历史记录中相邻的周）
+        self.limits = None  # 解析的行数和时间上限（validation.WorkbookLimits），None 表示不限制
+        self.layout = None  # 表格布局（layout.RosterLayout），None 表示读取时自动识别
     
-    def debug_print(self, message):
-        if self.debug:
-            print(message)
+    def set_output(self, serializer, include_vtimezone=False):
+        """选择日历的序列化方式，见 new_calendar()"""
+        self.serializer = serializer
+        self.include_vtimezone = include_vtimezone
+
+    def set_time_zone(self, name):
+        """设置事件使用的时区，名称无效时抛出 ValueError"""
+        get_zone(name)
+        self.time_zone = name
+
+    def snapshot(self):
+        """导出已解析的状态，供缓存复用"""
+        return {
+            'content_hash': self.content_hash,
+            'sheet_name': self.sheet_name,
+            'anchor_dates': tuple(self.anchor_dates),
+            'df': self.df,
+            'layout': self.layout,
+            'week_info': self.week_info,
+            'days_info': list(self.days_info),
+            'employees': None if self.employees is None else list(self.employees),
+            'employee_index': self.employee_index,
+            'shifts': self.shifts,
+        }
+    
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """从缓存的解析状态恢复，不再读取Excel文件"""
+        scheduler = cls(None)
+        scheduler.content_hash = snapshot['content_hash']
+        scheduler.sheet_name = snapshot.get('sheet_name')
+        scheduler.anchor_dates = tuple(snapshot.get('anchor_dates', ()))
+        scheduler.df = snapshot['df']
+        scheduler.layout = snapshot.get('layout')
+        scheduler.week_info = snapshot['week_info']
+        scheduler.days_info = list(snapshot['days_info'])
+        if snapshot['employees'] is not None:
+            scheduler.employees = list(snapshot['employees'])
+        scheduler.employee_index = snapshot.get('employee_index')
+        scheduler.shifts = snapshot['shifts']
+        return scheduler
     
     def read_excel(self):
+        if self.df is not None:
+            return True
+        
+        limits = self.limits
+        deadline = None
+        if limits is not None and limits.parse_timeout:
+            deadline = time.monotonic() + limits.parse_timeout
+
+        if self.reader == 'streaming':
+            try:
+                self.df, self.layout = read_roster_streaming(
+                    self.file_path,
+                    sheet_name=self.sheet_name,
+                    layout=self.layout,
+                    max_rows=limits.max_rows if limits is not None else None,
+                    deadline=deadline,
+                )
+                logger.debug("成功读取Excel文件")
+                return True
+            except TimeoutError:
+                # 超时不再退回 pandas，直接交给调用方拒绝这次上传
+                raise
+            except Exception as e:
+                # 例如 .xls 文件，openpyxl 无法读取时退回 pandas
+                logger.info("流式读取Excel文件失败，改用pandas读取: %s", e)
+        
         try:
             # 读取Excel文件，不使用默认的header
-            self.df = pd.read_excel(self.file_path, header=None)
-            self.debug_print(f"成功读取Excel文件")
+            if deadline is None:
+                self.df = read_roster_pandas(self.file_path, sheet_name=self.sheet_name or 0)
+            else:
+                # pandas 整表读取无法中途检查时间，在解析子进程中读取，超时时结束该子进程
+                self.df = get_parse_workers().run(
+                    deadline, read_roster_pandas, portable_source(self.file_path), self.sheet_name or 0
+                )
+            if self.layout is None:
+                self.layout = resolve_layout(self.df.iloc[:HEADER_SCAN_ROWS, :HEADER_SCAN_COLUMNS].values.tolist())
+            logger.debug("成功读取Excel文件")
             return True
+        except TimeoutError:
+            raise
         except Exception as e:
-            print(f"读取Excel文件错误: {str(e)}")
+            logger.warning("读取Excel文件错误: %s", e)
             return False
     
     def get_week_info(self):
+        if self.week_info is not None:
+            return True
+        
         try:
-            # 从B1和B2获取周信息
-            week_info_b1 = str(self.df.iloc[0, 1]).strip()
-            week_info_b2 = str(self.df.iloc[1, 1]).strip()
+            # 从布局中的周信息单元格获取（默认为 B1 和 B2），取第一个非空的
+            values = [str(self.df.iloc[row, column]).strip() for row, column in self.layout.week_cells]
             
-            self.week_info = week_info_b1 if week_info_b1 and week_info_b1 != 'nan' else week_info_b2
-            self.debug_print(f"获取到的周信息: {self.week_info}")
+            self.week_info = next((value for value in values if value and value != 'nan'), values[-1])
+            logger.debug("获取到的周信息: %s", self.week_info)
             
             return True
         except Exception as e:
-            print(f"获取周信息错误: {str(e)}")
+            logger.warning("获取周信息错误: %s", e)
             return False
     
     def get_days_info(self):
+        if self.days_info:
+            return True
+        
         try:
-            # 获取每天的日期信息（B4, E4, H4, K4, N4, Q4, T4）
-            day_columns = [1, 4, 7, 10, 13, 16, 19]  # B=1, E=4, H=7 等
+            # 获取每天的日期信息（默认布局为 B4, E4, H4, K4, N4, Q4, T4）
+            day_columns = self.layout.day_columns
             
-            # 先收集所有日期信息，检查是否跨年
+            # 先收集所有日期信息，再统一推断年份
             temp_days_info = []
-            months = set()
             
             for col in day_columns:
-                day_info = str(self.df.iloc[3, col]).strip()
+                day_info = str(self.df.iloc[self.layout.date_row, col]).strip()
                 if day_info and day_info != 'nan':
                     # 解析日期，格式如 "Monday 11/11"
-                    match = re.search(r'(\w+)\s+(\d{1,2}/\d{1,2})', day_info)
+                    match = DAY_PATTERN.search(day_info)
                     if match:
                         day, month = map(int, match.group(2).split('/'))
-                        months.add(month)
-                        temp_days_info.append({
-                            'weekday': match.group(1),
-                            'date': match.group(2),
-                            'column': col,
-                            'month': month,
-                            'day': day
-                        })
+                        temp_days_info.append(Day(
+                            weekday=match.group(1),
+                            text=match.group(2),
+                            day=day,
+                            month=month,
+                            column=col,
+                        ))
             
-            # 检查是否跨年（同时存在12月和1月）
-            is_year_end = 12 in months and 1 in months
-            current_year = datetime.now().year
+            # 按星期和参考日期推断年份，跨年的周中 1 月的日期自动算到下一年
+            infer_years(temp_days_info, self.anchor_dates)
             
-            # 处理年份
             self.days_info = []
             for day_data in temp_days_info:
-                # 只有在跨年且月份为1月时才加一年
-                year = current_year + 1 if (is_year_end and day_data['month'] == 1) else current_year
-                day_data['year'] = year
                 self.days_info.append(day_data)
-                self.debug_print(f"解析到日期信息: {day_data}")
+                logger.debug("解析到日期信息: %s", day_data)
             
             return True
         except Exception as e:
-            print(f"获取日期信息错误: {str(e)}")
+            logger.warning("获取日期信息错误: %s", e)
             return False
     
     def get_employees(self):
         """获取员工列表"""
+        if self.employees is not None:
+            return self.employees
+        
         try:
-            # 从第4行开始查找A列的员工名字
+            # 从员工区域的第一行开始查找名字列（默认布局为第5行起的A列）
             employees = []
-            for idx in range(4, len(self.df)):
-                name = str(self.df.iloc[idx, 0]).strip()
+            name_column = self.layout.name_column
+            for idx in range(self.layout.first_employee_row, len(self.df)):
+                name = str(self.df.iloc[idx, name_column]).strip()
                 if name and name != 'nan':
-                    employees.append({
-                        'name': name,
-                        'row': idx
-                    })
+                    employees.append(Employee(name, row=idx))
             
-            self.debug_print(f"找到的员工列表: {employees}")
+            logger.debug("找到的员工列表: %s", employees)
+            self.employees = employees
             return employees
         except Exception as e:
-            print(f"获取员工列表错误: {str(e)}")
+            logger.warning("获取员工列表错误: %s", e)
             return []
     
+    def get_employee_index(self):
+        """员工名字索引，每份排班表只建立一次"""
+        if self.employee_index is None:
+            self.employee_index = EmployeeIndex(self.get_employees())
+        return self.employee_index
+
     def find_employee_row(self, employee_name):
-        """根据员工名字查找对应的行号"""
+        """根据员工名字查找对应的行号
+
+        依次尝试完全匹配（忽略大小写和多余空白）、前缀匹配和模糊匹配，
+        只有一个最佳候选时才返回，避免 "Li" 误匹配到 "Lilian"。
+        """
         try:
-            # 在A列查找指定员工名字的单元格
-            column_a = self.df.iloc[:, 0].astype(str)
-            employee_rows = column_a.str.contains(employee_name, case=False, regex=False)
-            matching_rows = self.df.index[employee_rows].tolist()
-            
-            if not matching_rows:
-                print(f"未找到员工 {employee_name} 的排班信息")
+            employee = self.get_employee_index().find(employee_name)
+            if employee is None:
+                logger.info("未找到员工 %s 的排班信息", employee_name)
                 return None
             
-            self.debug_print(f"找到员工 {employee_name} 所在行: {matching_rows[0]}")
-            return matching_rows[0]  # 返回第一个匹配的行号
+            logger.debug("找到员工 %s 所在行: %s", employee_name, employee.row)
+            return employee.row
         except Exception as e:
-            print(f"查找员工行号错误: {str(e)}")
+            logger.warning("查找员工行号错误: %s", e)
             return None
     
-    def get_shift_times(self, row_index, day_column):
-        try:
-            start_time = str(self.df.iloc[row_index, day_column]).strip()
-            end_time = str(self.df.iloc[row_index, day_column + 1]).strip()  # 修改：在同一行获取结束时间
-            task = str(self.df.iloc[row_index, day_column + 2]).strip()  # 修改：在同一行获取任务
-            
-            # 检查时间格式
-            if start_time == 'nan' or end_time == 'nan':
-                return None, None, None
-            
-            self.debug_print(f"获取到班次信息 - 开始: {start_time}, 结束: {end_time}, 任务: {task}")
-            
-            # 统一时间格式（去除秒）
-            if ':' in start_time:
-                start_time = start_time.split(':')[0] + ':' + start_time.split(':')[1]
-            if ':' in end_time:
-                end_time = end_time.split(':')[0] + ':' + end_time.split(':')[1]
-            
-            return start_time, end_time, task
-        except Exception as e:
-            print(f"获取班次时间错误: {str(e)}")
-            return None, None, None
-    
-    def create_calendar(self, employee_row):
-        cal = Calendar()
-        cal.add('prodid', '-//Sushi Restaurant Shift Schedule//EN')
-        cal.add('version', '2.0')
-        
-        for day_info in self.days_info:
-            start_time, end_time, task = self.get_shift_times(employee_row, day_info['column'])
-            if not all([start_time, end_time]):
-                continue
-            
-            try:
-                start_hour, start_minute = map(int, start_time.split(':'))
-                end_hour, end_minute = map(int, end_time.split(':'))
-                
-                # 使用 day_info 中的年份、月份和日期
-                start_dt = self.timezone.localize(datetime(
-                    day_info['year'],
-                    day_info['month'],
-                    day_info['day'],
-                    start_hour,
-                    start_minute
-                ))
-                
-                end_dt = self.timezone.localize(datetime(
-                    day_info['year'],
-                    day_info['month'],
-                    day_info['day'],
-                    end_hour,
-                    end_minute
-                ))
-                
-                event = Event()
-                event.add('summary', f'{task if task else "Work"} {start_hour}-{end_hour}')
-                event.add('dtstart', start_dt)
-                event.add('dtend', end_dt)
-                event.add('description', f'Task: {task}')
-                
-                cal.add_component(event)
-                self.debug_print(f"添加事件: {day_info['year']}/{day_info['month']}/{day_info['day']} {start_time}-{end_time} {task}")
-            except Exception as e:
-                print(f"创建事件错误: {str(e)}")
+    def employee_candidates(self, employee_name, limit=5):
+        """与名字最接近的员工名，用于提示"""
+        return self.get_employee_index().suggestions(employee_name, limit)
+
+    def extract_shifts(self, rows=None):
+        """一次性切出员工行的 开始/结束/任务 三列，解析为 Shift 记录
+
+        各列的位置来自布局（self.layout）。每个单元格只在这里解析一次（时间转换为从零点起的分钟数），
+        返回 {员工行: (Shift, ...)}，预览和日历生成都直接使用这份结果。
+        开始或结束为空的单元格不算班次；无法解析的时间记录警告后跳过。
+        """
+        import numpy as np
+        import pandas as pd
+
+        if rows is None:
+            rows = [employee.row for employee in self.get_employees()]
+
+        shifts = {row: [] for row in rows}
+        columns = [day_info.column for day_info in self.days_info]
+        if not rows or not columns:
+            return {row: () for row in rows}
+
+        # 表格右侧缺少的列按空单元格处理
+        layout = self.layout
+        grid = self.df.reindex(columns=range(max(len(self.df.columns), layout.max_column)))
+        values = grid.to_numpy(dtype=object)[rows]
+
+        def cells(offset):
+            block = values[:, [column + offset for column in columns]]
+            return pd.Series(block.ravel(), dtype=object).astype(str).str.strip()
+
+        start_time = cells(layout.start_offset)
+        end_time = cells(layout.end_offset)
+        # 没有任务列的模板，任务都为空
+        task = cells(layout.task_offset) if layout.task_offset is not None else None
+        start_minutes = _parse_minutes(_trim_seconds(start_time))
+        end_minutes = _parse_minutes(_trim_seconds(end_time))
+        present = (~start_time.isin(['nan', '']) & ~end_time.isin(['nan', ''])).to_numpy()
+
+        for position in np.flatnonzero(present):
+            row = rows[position // len(columns)]
+            day_index = position % len(columns)
+            start, end = start_minutes[position], end_minutes[position]
+            if pd.isna(start) or pd.isna(end):
+                logger.warning("无法解析时间: %s-%s（第 %s 行）", start_time[position], end_time[position], row + 1)
                 continue
-        
+            shifts[row].append(Shift(
+                row=row,
+                day_index=day_index,
+                start=int(start),
+                end=int(end),
+                task='' if task is None or task[position] == 'nan' else task[position],
+            ))
+
+        return {row: tuple(items) for row, items in shifts.items()}
+
+    def get_employee_shifts(self, employee_row):
+        """返回某位员工的班次 [(Day, Shift)]"""
+        if self.shifts is None:
+            self.shifts = self.extract_shifts()
+
+        shifts = self.shifts.get(employee_row)
+        if shifts is None:
+            # 不在员工列表中的行（例如按名字匹配到的其他行）单独解析
+            shifts = self.extract_shifts([employee_row])[employee_row]
+
+        return [(self.days_info[shift.day_index], shift) for shift in shifts]
+
+    def create_calendar(self, employee_row, stamps=None):
+        cal = new_calendar(self.serializer, self.include_vtimezone)
+        self.add_shift_events(cal, employee_row, stamps)
         return cal
+
+    def add_shift_events(self, cal, employee_row, stamps=None, uids=None):
+        """把员工本周的班次作为事件加入日历
+
+        stamps 为 {uid: (dtstamp, sequence)}，来自已签发事件的记录；
+        没有记录的事件使用当前时间和 SEQUENCE 0。uids 不为空时只加入其中的事件。
+        """
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for summary, start_dt, end_dt, description, uid in self.iter_events(employee_row):
+            if uids is not None and uid not in uids:
+                continue
+            dtstamp, sequence = (stamps or {}).get(uid, (now, 0))
+            add_event(cal, summary, start_dt, end_dt, description, uid=uid, dtstamp=dtstamp, sequence=sequence)
+
+    def employee_name_at(self, employee_row):
+        """员工行对应的名字"""
+        for employee in self.get_employees():
+            if employee.row == employee_row:
+                return employee.name
+        return str(self.df.iloc[employee_row, self.layout.name_column]).strip()
+
+    def iter_events(self, employee_row):
+        """逐个生成员工本周的事件 (summary, dtstart, dtend, description, uid)
+
+        结束时间早于开始时间的班次跨过午夜，结束于第二天。
+        """
+        # 本周的 UTC 偏移表（按时区和周缓存），循环中不再逐个查询时区
+        offsets = week_offset_table(self.time_zone, self.days_info)
+        employee_name = self.employee_name_at(employee_row)
+        slots = {}  # 日期 -> 当天已生成的班次数
+        for day_info, shift in self.get_employee_shifts(employee_row):
+            day = day_info.to_date()
+            if day is None:
+                logger.warning("无效的日期: %s/%s/%s", day_info.year, day_info.month, day_info.day)
+                continue
+
+            start_dt, end_dt = offsets.localize_shift(day, shift.start, shift.end)
+
+            slot = slots.get(day, 0)
+            slots[day] = slot + 1
+
+            yield (
+                shift.summary(),
+                start_dt,
+                end_dt,
+                f'Task: {shift.task}',
+                event_uid(employee_name, day, slot),
+            )
+            logger.debug("添加事件: %s %s-%s %s", day, shift.start_time, shift.end_time, shift.task)
+
+    def render_events(self, employee_row, stamps=None):
+        """只序列化员工本周的 VEVENT 部分，用于拼接订阅源"""
+        cal = new_calendar(self.serializer)
+        self.add_shift_events(cal, employee_row, stamps)
+        return calendar_events(cal)
+
+    def week_start(self):
+        """本周第一天的日期，无法确定时返回 None"""
+        dates = [day_info.to_date() for day_info in self.days_info]
+        dates = [value for value in dates if value is not None]
+        return min(dates) if dates else None
+
+    def employee_key(self, employee):
+        """get_employees() 中的员工在 create_calendar 等方法中使用的键"""
+        return employee.row
+
+    def iter_employee_weeks(self, employee_row):
+        """[(周排班, 员工行)]，与 MultiWeekScheduler 的接口一致"""
+        return [(self, employee_row)]
+
+    def create_all_calendars(self, stamps=None):
+        """基于同一次解析为所有员工生成日历，返回 [(员工信息, 日历)]
+
+        stamps 为 {员工名: {uid: (dtstamp, sequence)}}
+        """
+        return [
+            (employee, self.create_calendar(self.employee_key(employee), (stamps or {}).get(employee.name)))
+            for employee in self.get_employees()
+        ]
     
     def save_calendar(self, cal, output_file):
         try:
             with open(output_file, 'wb') as f:
                 f.write(cal.to_ical())
-            print(f"日历文件已保存到: {output_file}")
+            logger.info("日历文件已保存到: %s", output_file)
             return True
         except Exception as e:
-            print(f"保存日历文件错误: {str(e)}")
+            logger.error("保存日历文件错误: %s", e)
             return False
     
-    def process(self):
+    def process(self, employee_name='Lulu', output_file=None):
+        """命令行用法：为一位员工生成本周的日历文件"""
         if not self.read_excel():
             return False
             
@@ -211,44 +475,64 @@ class ShiftScheduler:
         if not self.get_days_info():
             return False
             
-        lulu_row = self.find_lulu_row()
-        if lulu_row is None:
+        employee_row = self.find_employee_row(employee_name)
+        if employee_row is None:
             return False
-            
-        cal = self.create_calendar(lulu_row)
+
+        # 与接口的预览使用同一份班次记录
+        for day_info, shift in self.get_employee_shifts(employee_row):
+            logger.info("%s %s %s-%s %s", day_info.weekday, day_info.text, shift.start_time, shift.end_time, shift.task)
+
+        cal = self.create_calendar(employee_row)
         
         # 生成输出文件名
-        output_file = f"sushi_schedule_week_{datetime.now().strftime('%Y%m%d')}.ics"
+        output_file = output_file or f"sushi_schedule_week_{datetime.now().strftime('%Y%m%d')}.ics"
         
         return self.save_calendar(cal, output_file)
 
 if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description='把一份排班表转换为 iCal 文件（批量转换请使用 manage.py convert_rosters）')
+    parser.add_argument('roster', nargs='?', help='排班表文件，默认在程序所在目录查找以 "Duty Roster" 开头的 xlsx 文件')
+    parser.add_argument('--employee', default='Lulu', help='员工名字（默认 Lulu）')
+    parser.add_argument('--output', help='输出的 .ics 文件，默认 sushi_schedule_week_<日期>.ics')
+    args = parser.parse_args()
+
+    # 打包后的exe通常是双击运行，结束前保留窗口；命令行和 cron 中运行不等待输入
+    frozen = getattr(sys, 'frozen', False)
+    exit_code = 1
     try:
-        # 获取程序运行路径
-        if getattr(sys, 'frozen', False):
-            # 如果是打包后的exe运行
-            application_path = os.path.dirname(sys.executable)
-        else:
-            # 如果是python脚本运行
-            application_path = os.path.dirname(os.path.abspath(__file__))
-        
-        # 查找以"Duty Roster"开头的xlsx文件
-        excel_file = None
-        for file in os.listdir(application_path):
-            if file.startswith("Duty Roster") and file.endswith(".xlsx"):
-                excel_file = os.path.join(application_path, file)
-                break
+        excel_file = args.roster
+        if excel_file is None:
+            # 获取程序运行路径
+            if frozen:
+                # 如果是打包后的exe运行
+                application_path = os.path.dirname(sys.executable)
+            else:
+                # 如果是python脚本运行
+                application_path = os.path.dirname(os.path.abspath(__file__))
+            
+            # 查找以"Duty Roster"开头的xlsx文件
+            for file in sorted(os.listdir(application_path)):
+                if file.startswith("Duty Roster") and file.endswith(".xlsx"):
+                    excel_file = os.path.join(application_path, file)
+                    break
         
         if excel_file:
             print(f"找到排班表: {excel_file}")
             scheduler = ShiftScheduler(excel_file)
-            scheduler.process()
+            if scheduler.process(args.employee, args.output):
+                exit_code = 0
+            else:
+                print(f"错误: 无法为 {args.employee} 生成日历，请检查排班表格式和员工名字")
         else:
             print("错误: 在当前目录下未找到以'Duty Roster'开头的xlsx文件")
-        
-        # 添加程序结束提示
-        input("\n按回车键退出程序...")
             
     except Exception as e:
         print(f"程序运行出错: {str(e)}")
-        input("\n按回车键退出程序...")
\ No newline at end of file
+
+    if frozen:
+        input("\n按回车键退出程序...")
+    sys.exit(exit_code)
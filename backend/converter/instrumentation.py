@@ -0,0 +1,132 @@
+"""按阶段计时
+
+转换流程分为 parse（读取解析）、extract（提取班次）、build（生成日历）、
+serialize（序列化）、write（写入文件）等阶段。每个阶段的耗时同时记录到：
+
+- 当前请求的 StageTimer，由 TimingMiddleware 写入 Server-Timing 响应头；
+- 进程内的直方图，由 /api/metrics/ 以 Prometheus 文本格式输出。
+
+不在请求中（例如后台任务）时只记录直方图。
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# 直方图的分桶上限（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_timer = contextvars.ContextVar('stage_timer', default=None)
+
+
+class StageTimer:
+    """一次请求中各阶段的累计耗时，同名阶段多次出现时累加"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Server-Timing 响应头的值，单位毫秒"""
+        entries = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.stages.items()]
+        entries.append(f'total;dur={self.total() * 1000:.1f}')
+        return ', '.join(entries)
+
+
+class Histogram:
+    """按标签分组的累积直方图，与 Prometheus 的 histogram 类型对应"""
+
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}  # 标签值 -> [各分桶计数..., 总和, 次数]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_value, values in sorted(series.items()):
+            labels = f'{self.label}="{_escape_label(label_value)}"'
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {values[-1]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {values[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {values[-1]}')
+        return lines
+
+
+def _escape_label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+stage_durations = Histogram(
+    'roster_stage_duration_seconds',
+    'Duration of roster conversion stages.',
+    'stage',
+)
+request_durations = Histogram(
+    'roster_request_duration_seconds',
+    'Duration of converter API requests.',
+    'view',
+)
+
+
+def start_request_timer():
+    """为当前请求创建计时器，返回 (计时器, 用于恢复的 token)"""
+    timer = StageTimer()
+    return timer, _current_timer.set(timer)
+
+
+def finish_request_timer(token):
+    _current_timer.reset(token)
+
+
+def current_timer():
+    return _current_timer.get()
+
+
+@contextmanager
+def stage(name):
+    """记录一个阶段的耗时"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_durations.observe(name, elapsed)
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add(name, elapsed)
+
+
+def render_metrics():
+    """Prometheus 文本格式（version 0.0.4）"""
+    lines = stage_durations.render() + request_durations.render()
+    return '\n'.join(lines) + '\n'
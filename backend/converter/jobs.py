@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.utils import timezone
+
+from .models import ConversionJob
+from .concurrency import queue_parses
+from .services import ConversionError, convert_upload
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """后台线程池在第一次提交任务时创建"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CONVERSION_JOB_WORKERS', 2),
+                thread_name_prefix='conversion-job',
+            )
+        return _executor
+
+
+def submit_conversion_job(excel_file, employee_name, all_sheets=False, time_zone=None, delta=False):
+    """创建任务记录并把转换交给后台线程池
+
+    上传的文件在请求结束后会被清理，所以先把内容读入内存。
+    """
+    content = ContentFile(b''.join(excel_file.chunks()), name=excel_file.name)
+
+    purge_expired_jobs()
+    job = ConversionJob.objects.create(employee_name=employee_name)
+    _get_executor().submit(run_conversion_job, job.pk, content, employee_name, all_sheets, time_zone, delta)
+    return job
+
+
+def run_conversion_job(job_id, excel_file, employee_name, all_sheets=False, time_zone=None, delta=False):
+    """在后台线程中执行转换，并把结果写回任务记录"""
+    try:
+        ConversionJob.objects.filter(pk=job_id).update(status=ConversionJob.STATUS_RUNNING)
+
+        try:
+            # 后台任务不直接面对用户，解析名额已满时排队等待而不是失败
+            with queue_parses():
+                result = convert_upload(
+                    excel_file, employee_name, all_sheets=all_sheets, time_zone=time_zone, delta=delta,
+                )
+        except ConversionError as e:
+            _finish_job(job_id, ConversionJob.STATUS_FAILED, e.message)
+        except Exception as e:
+            _finish_job(job_id, ConversionJob.STATUS_FAILED, f'处理文件时出错: {str(e)}')
+        else:
+            _finish_job(job_id, ConversionJob.STATUS_FINISHED, '转换成功', result)
+    finally:
+        # 线程池中的线程不经过请求周期，需要自己关闭数据库连接
+        connection.close()
+
+
+def _finish_job(job_id, job_status, message, result=None):
+    ConversionJob.objects.filter(pk=job_id).update(
+        status=job_status,
+        message=message[:500],
+        result=result,
+        finished_at=timezone.now(),
+    )
+
+
+def purge_expired_jobs():
+    """删除超过保留时间的任务记录"""
+    ttl = getattr(settings, 'CONVERSION_JOB_TTL', 86400)
+    ConversionJob.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=ttl)).delete()
@@ -0,0 +1,283 @@
+"""排班表的布局
+
+RosterLayout 声明式地描述一种排班表模板：周信息所在的单元格、日期行、每天 开始/结束/任务
+所在的列、员工名字所在的列以及员工区域的起始行（行列下标都从 0 开始）。
+默认布局 DEFAULT_LAYOUT 是最初的模板：B1/B2 为周信息，第 4 行 B、E、H … T 列为日期，
+从第 5 行开始 A 列为员工，每天占相邻的 开始/结束/任务 三列。
+
+其他门店的模板可以在 ROSTER_LAYOUT 中写出布局，或者交给 detect_layout() 自动识别：
+只扫描前 HEADER_SCAN_ROWS 行，找到日期最多的一行作为日期行，按日期之间的间距和下面
+几行中时间出现的位置确定每天各列的偏移。识别结果按表头指纹（见 header_fingerprint）
+缓存，同一模板之后的上传（包括日期不同的下一周）直接复用，不再识别。
+"""
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, time
+
+# 日期行中的日期，例如 "Monday 11/11"
+DAY_PATTERN = re.compile(r'(\w+)\s+(\d{1,2}/\d{1,2})')
+# 文本形式的时间，例如 "9:00"、"09:00:00"
+TIME_PATTERN = re.compile(r'^\d{1,2}\s*:\s*\d{2}(\s*:\s*\d{2})?$')
+# 列标题中的任务列，例如 "Task"、"Role"
+TASK_LABEL_PATTERN = re.compile(r'task|role|station|position|duty|job|任务|岗位', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'^[\d.,:\s-]+$')
+# 周信息的提示，例如 "[WEEK 3]"、"11/11 - 17/11"
+WEEK_PATTERN = re.compile(r'week|\d{1,2}/\d{1,2}', re.IGNORECASE)
+
+HEADER_SCAN_ROWS = 8  # 识别布局时读取的行数（表头和最前面的几行员工）
+HEADER_SCAN_COLUMNS = 64  # 识别布局时读取的列数
+LAYOUT_CACHE_SIZE = 64  # 最多缓存的模板数量
+
+
+@dataclass(slots=True, frozen=True)
+class RosterLayout:
+    """一种排班表模板的布局"""
+    week_cells: tuple = ((0, 1), (1, 1))  # 周信息所在的 (行, 列)，取第一个非空的
+    date_row: int = 3
+    day_columns: tuple = (1, 4, 7, 10, 13, 16, 19)  # 每天第一列的下标
+    name_column: int = 0
+    first_employee_row: int = 4
+    start_offset: int = 0  # 开始/结束/任务 相对于每天第一列的偏移
+    end_offset: int = 1
+    task_offset: int | None = 2  # None 表示模板没有任务列
+
+    @property
+    def max_column(self):
+        """需要读取的列数"""
+        offsets = [self.start_offset, self.end_offset]
+        if self.task_offset is not None:
+            offsets.append(self.task_offset)
+        columns = [max(self.day_columns) + max(offsets), self.name_column]
+        columns += [column for _, column in self.week_cells]
+        return max(columns) + 1
+
+    def as_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, spec):
+        """由配置中的字典创建布局，未知的键或缺少日期列时抛出 ValueError"""
+        unknown = set(spec) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f'未知的布局属性: {", ".join(sorted(unknown))}')
+        values = dict(spec)
+        if 'week_cells' in values:
+            values['week_cells'] = tuple(tuple(cell) for cell in values['week_cells'])
+        if 'day_columns' in values:
+            values['day_columns'] = tuple(values['day_columns'])
+        layout = cls(**values)
+        if not layout.day_columns:
+            raise ValueError('布局中至少需要一个日期列')
+        return layout
+
+    @classmethod
+    def from_settings(cls):
+        """ROSTER_LAYOUT 为 'auto' 时返回 None（自动识别），否则按配置的字典创建布局"""
+        from django.conf import settings
+
+        spec = getattr(settings, 'ROSTER_LAYOUT', 'auto')
+        if spec is None or spec == 'auto':
+            return None
+        return cls.from_dict(spec)
+
+
+DEFAULT_LAYOUT = RosterLayout()
+
+
+def _text(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ''
+        if value.is_integer():
+            # 与 readers._convert_cell 一致，预检查和解析时读到的表头指纹相同
+            value = int(value)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _is_time(value):
+    if isinstance(value, (time, datetime)):
+        return True
+    return bool(TIME_PATTERN.match(_text(value)))
+
+
+def _is_label(value):
+    """文字（名字、任务），不是空单元格、数字或时间"""
+    if isinstance(value, (int, float, time, datetime)):
+        return False
+    text = _text(value)
+    return bool(text) and not NUMBER_PATTERN.match(text) and not TIME_PATTERN.match(text)
+
+
+def _cell(rows, row, column):
+    values = rows[row] if row < len(rows) else ()
+    return values[column] if column < len(values) else None
+
+
+def _date_row(rows):
+    """日期最多的一行，返回 (行下标, 日期所在的列)；没有日期时返回 (None, ())"""
+    best, best_columns = None, ()
+    for index, values in enumerate(rows):
+        columns = tuple(column for column, value in enumerate(values) if DAY_PATTERN.search(_text(value)))
+        if len(columns) > len(best_columns):
+            best, best_columns = index, columns
+    return best, best_columns
+
+
+def header_fingerprint(rows):
+    """表头（日期行及其以上各行）的指纹
+
+    日期记为同一个标记、其余文本中的数字记为 #，因此同一模板不同周的排班表指纹相同。
+    没有日期行时返回 None。
+    """
+    date_row, _ = _date_row(rows)
+    if date_row is None:
+        return None
+    lines = []
+    for values in rows[:date_row + 1]:
+        tokens = ['<day>' if DAY_PATTERN.search(text) else re.sub(r'\d+', '#', text)
+                  for text in map(_text, values)]
+        while tokens and not tokens[-1]:
+            tokens.pop()
+        lines.append('\x1f'.join(tokens))
+    return hashlib.sha256('\x1e'.join(lines).encode('utf-8')).hexdigest()
+
+
+def detect_layout(rows):
+    """从表格最前面的几行识别布局，找不到日期行或每天不足两列时返回 None
+
+    rows 为前 HEADER_SCAN_ROWS 行的单元格值（None 或 NaN 表示空单元格）。
+    """
+    date_row, day_columns = _date_row(rows)
+    if date_row is None:
+        return None
+
+    gaps = [b - a for a, b in zip(day_columns, day_columns[1:])]
+    width = min(gaps) if gaps else 3
+    if width < 2:
+        return None
+
+    # 日期行下面的几行中，时间出现在每天的第几列
+    time_counts = [0] * width
+    for row in range(date_row + 1, len(rows)):
+        for column in day_columns:
+            for offset in range(width):
+                if _is_time(_cell(rows, row, column + offset)):
+                    time_counts[offset] += 1
+    time_offsets = [offset for offset in range(width) if time_counts[offset]]
+    start_offset, end_offset = time_offsets[:2] if len(time_offsets) >= 2 else (0, 1)
+
+    # 跳过日期行下面的列标题行（例如 "Start End Task"），最多两行
+    first_employee_row = date_row + 1
+    while (first_employee_row < min(len(rows), date_row + 3)
+           and _is_column_header(rows, first_employee_row, day_columns, (start_offset, end_offset))):
+        first_employee_row += 1
+
+    # 任务列：列标题像任务的一列；没有列标题时取员工行中出现文字（不含数字和时间）最多的一列
+    others = [offset for offset in range(width) if offset not in (start_offset, end_offset)]
+    task_offset = next((
+        offset for offset in others
+        for row in range(date_row + 1, first_employee_row)
+        if TASK_LABEL_PATTERN.search(_text(_cell(rows, row, day_columns[0] + offset)))
+    ), None)
+    if task_offset is None and others:
+        text_counts = {offset: 0 for offset in others}
+        for row in range(first_employee_row, len(rows)):
+            for column in day_columns:
+                for offset in others:
+                    if _is_label(_cell(rows, row, column + offset)):
+                        text_counts[offset] += 1
+        task_offset = max(others, key=lambda offset: (text_counts[offset], -offset))
+
+    # 员工名字：第一个日期列左侧文字最多的一列（序号列不算）
+    name_counts = {}
+    for values in rows[first_employee_row:]:
+        for column in range(min(day_columns[0], len(values))):
+            if _is_label(values[column]):
+                name_counts[column] = name_counts.get(column, 0) + 1
+    name_column = max(name_counts, key=lambda column: (name_counts[column], -column)) if name_counts else 0
+
+    # 周信息：日期行以上像周信息的单元格，先找第一个日期列（默认模板为 B1/B2），再找其左侧各列
+    week_cells = ()
+    for columns in ((day_columns[0],), range(day_columns[0])):
+        week_cells = tuple(
+            (row, column)
+            for row in range(date_row)
+            for column in columns
+            if WEEK_PATTERN.search(_text(_cell(rows, row, column)))
+        )
+        if week_cells:
+            break
+    if not week_cells:
+        week_cells = tuple(cell for cell in DEFAULT_LAYOUT.week_cells if cell[0] < date_row) or ((0, name_column),)
+
+    return RosterLayout(
+        week_cells=week_cells,
+        date_row=date_row,
+        day_columns=day_columns,
+        name_column=name_column,
+        first_employee_row=first_employee_row,
+        start_offset=start_offset,
+        end_offset=end_offset,
+        task_offset=task_offset,
+    )
+
+
+def _is_column_header(rows, row, day_columns, offsets):
+    """多数日期的 开始、结束 两列都是非时间的文本，例如 "Start" "End" """
+    labels = 0
+    for column in day_columns:
+        values = [_cell(rows, row, column + offset) for offset in offsets]
+        if all(_text(value) and not _is_time(value) for value in values):
+            labels += 1
+    return labels * 2 > len(day_columns)
+
+
+class LayoutCache:
+    """按表头指纹缓存识别出的布局（LRU），进程内共享"""
+
+    def __init__(self, max_entries=LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, rows):
+        """返回表格的布局；识别失败时返回 None"""
+        fingerprint = header_fingerprint(rows)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            layout = self._layouts.get(fingerprint)
+            if layout is not None:
+                self._layouts.move_to_end(fingerprint)
+                self.hits += 1
+                return layout
+            self.misses += 1
+
+        layout = detect_layout(rows)
+        if layout is not None:
+            with self._lock:
+                self._layouts[fingerprint] = layout
+                while len(self._layouts) > self.max_entries:
+                    self._layouts.popitem(last=False)
+        return layout
+
+    def clear(self):
+        with self._lock:
+            self._layouts.clear()
+            self.hits = self.misses = 0
+
+
+layout_cache = LayoutCache()
+
+
+def resolve_layout(rows):
+    """识别（或从缓存取出）表格的布局，识别失败时使用默认布局"""
+    return layout_cache.resolve(rows) or DEFAULT_LAYOUT
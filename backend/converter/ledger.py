@@ -0,0 +1,149 @@
+"""已签发事件的记录
+
+每个事件的 UID 由（员工, 日期, 当天第几个班次）决定，见 ical.event_uid。
+签发时与上一次签发的内容哈希比较：
+
+- 新出现的事件 SEQUENCE 为 0，DTSTAMP 为本次签发时间；
+- 内容变化的事件 SEQUENCE 加一，DTSTAMP 更新；
+- 内容不变的事件沿用原来的 DTSTAMP 和 SEQUENCE，日历仍然逐字节相同；
+- 排班表覆盖的日期中，之前签发过但这次没有的事件视为取消。
+
+增量模式只输出新增、修改（METHOD:PUBLISH）和取消（METHOD:CANCEL）的事件。
+"""
+from django.utils import timezone
+
+from .ical import add_event, event_hash, new_calendar
+from .models import IssuedEvent
+from .names import normalize_name
+from .timezones import get_zone
+from .transactions import write_transaction
+from .workbook import scheduler_weeks
+
+
+def roster_dates(scheduler):
+    """排班表覆盖的所有日期"""
+    dates = {day_info.to_date() for week in scheduler_weeks(scheduler) for day_info in week.days_info}
+    dates.discard(None)
+    return dates
+
+
+def _collect_events(scheduler, employee_row):
+    events = []
+    for week, row in scheduler.iter_employee_weeks(employee_row):
+        for summary, start, end, description, uid in week.iter_events(row):
+            events.append({
+                'uid': uid,
+                'date': start.date(),
+                'hash': event_hash(summary, start, end, description),
+                'summary': summary[:255],
+                'start': start,
+                'end': end,
+                'time_zone': week.time_zone,
+            })
+    return events
+
+
+def _apply(record, event):
+    record.content_hash = event['hash']
+    record.summary = event['summary']
+    record.dtstart = event['start']
+    record.dtend = event['end']
+    record.time_zone = event['time_zone']
+
+
+UPDATE_FIELDS = ['content_hash', 'sequence', 'dtstamp', 'cancelled', 'summary', 'dtstart', 'dtend', 'time_zone']
+
+
+def issue_events(scheduler, employee_rows):
+    """签发员工的事件，返回 {员工行: 签发结果}
+
+    签发结果包含 stamps（{uid: (dtstamp, sequence)}，传给 create_calendar）、
+    added / changed（uid 列表）和 cancelled（被取消的 IssuedEvent 列表）。
+    """
+    now = timezone.now().replace(microsecond=0)
+    dates = roster_dates(scheduler)
+
+    # 规范化后同名的员工共用同一组 UID，只签发一次
+    keys = {}
+    for row in employee_rows:
+        keys.setdefault(normalize_name(scheduler.employee_name_at(row)), row)
+    collected = {key: _collect_events(scheduler, row) for key, row in keys.items()}
+
+    results = {}
+    with write_transaction():
+        existing = {}
+        for record in IssuedEvent.objects.select_for_update().filter(employee_key__in=list(keys), event_date__in=dates):
+            existing.setdefault(record.employee_key, {})[record.uid] = record
+
+        to_create, to_update = [], []
+        for key, events in collected.items():
+            records = existing.get(key, {})
+            stamps, added, changed, seen = {}, [], [], set()
+            for event in events:
+                uid = event['uid']
+                if uid in seen:
+                    continue
+                seen.add(uid)
+
+                record = records.get(uid)
+                if record is None:
+                    record = IssuedEvent(employee_key=key, uid=uid, event_date=event['date'], sequence=0, dtstamp=now)
+                    _apply(record, event)
+                    to_create.append(record)
+                    added.append(uid)
+                elif record.cancelled or record.content_hash != event['hash']:
+                    (added if record.cancelled else changed).append(uid)
+                    record.sequence += 1
+                    record.dtstamp = now
+                    record.cancelled = False
+                    _apply(record, event)
+                    to_update.append(record)
+                stamps[uid] = (record.dtstamp, record.sequence)
+
+            cancelled = []
+            for uid, record in records.items():
+                if uid not in seen and not record.cancelled:
+                    record.sequence += 1
+                    record.dtstamp = now
+                    record.cancelled = True
+                    to_update.append(record)
+                    cancelled.append(record)
+
+            results[key] = {'stamps': stamps, 'added': added, 'changed': changed, 'cancelled': cancelled}
+
+        IssuedEvent.objects.bulk_create(to_create)
+        IssuedEvent.objects.bulk_update(to_update, UPDATE_FIELDS)
+
+    return {row: results[normalize_name(scheduler.employee_name_at(row))] for row in employee_rows}
+
+
+def delta_calendars(scheduler, employee_row, issued):
+    """增量日历 (publish, cancel)，没有对应的事件时为 None
+
+    publish 为 METHOD:PUBLISH，只包含新增和修改的事件；
+    cancel 为 METHOD:CANCEL，包含取消的事件（STATUS:CANCELLED）。
+    """
+    publish = cancel = None
+
+    uids = set(issued['added']) | set(issued['changed'])
+    if uids:
+        publish = new_calendar(scheduler.serializer, scheduler.include_vtimezone, method='PUBLISH')
+        for week, row in scheduler.iter_employee_weeks(employee_row):
+            week.add_shift_events(publish, row, issued['stamps'], uids)
+
+    if issued['cancelled']:
+        cancel = new_calendar(scheduler.serializer, scheduler.include_vtimezone, method='CANCEL')
+        for record in issued['cancelled']:
+            zone = get_zone(record.time_zone)
+            add_event(
+                cancel,
+                record.summary,
+                record.dtstart.astimezone(zone),
+                record.dtend.astimezone(zone),
+                uid=record.uid,
+                dtstamp=record.dtstamp,
+                sequence=record.sequence,
+                status='CANCELLED',
+            )
+
+    return publish, cancel
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.pipeline import run_benchmark
+
+
+class Command(BaseCommand):
+    help = '用合成的排班表测量解析、日历生成和 /api/convert/ 各阶段的耗时与峰值内存，输出 JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=30, help='每周的员工人数')
+        parser.add_argument('--weeks', type=int, default=1, help='周数（每周一个工作表，大于 1 时按多工作表转换）')
+        parser.add_argument('--repeat', type=int, default=5, help='每个阶段重复的次数')
+        parser.add_argument('--reader', choices=['streaming', 'pandas'], help='Excel 读取方式，默认使用 ROSTER_READER')
+        parser.add_argument('--seed', type=int, default=0, help='生成排班表的随机种子')
+        parser.add_argument('--skip-api', action='store_true', help='不测量 /api/convert/ 请求')
+        parser.add_argument('--output', help='把 JSON 结果写入文件，默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        result = run_benchmark(
+            employees=options['employees'],
+            weeks=options['weeks'],
+            repeat=options['repeat'],
+            reader=options['reader'],
+            include_api=not options['skip_api'],
+            seed=options['seed'],
+        )
+        content = json.dumps(result, indent=2, ensure_ascii=False)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(content + '\n')
+            self.stdout.write(f'结果已写入 {options["output"]}')
+        else:
+            self.stdout.write(content)
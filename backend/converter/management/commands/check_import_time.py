@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from converter.warmup import PARSER_MODULES
+
+# 在全新的解释器中加载 Django 和 URL 配置（与服务进程处理第一个请求之前的导入相同）
+_PROBE = '''
+import importlib, json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+importlib.import_module(settings.ROOT_URLCONF)
+elapsed = time.perf_counter() - started
+print(json.dumps({'elapsed_ms': elapsed * 1000, 'modules': sorted(sys.modules)}))
+'''
+
+
+class Command(BaseCommand):
+    help = '检查冷启动的导入时间：加载 URL 配置不应导入解析依赖，且总时间不超过预算（可在 CI 中运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            default=getattr(settings, 'IMPORT_TIME_BUDGET_MS', 800),
+            help='导入时间上限（毫秒）',
+        )
+        parser.add_argument('--top', type=int, default=10, help='列出自身耗时最多的模块数')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        # 检查的是导入，不执行预热
+        env['CONVERTER_PRELOAD'] = '0'
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _PROBE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'导入失败：\n{completed.stderr[-2000:]}')
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        elapsed = result['elapsed_ms']
+        self.stdout.write(f'加载 {settings.ROOT_URLCONF}：{elapsed:.0f} ms（预算 {options["budget_ms"]:.0f} ms）')
+        for name, microseconds in _slowest(completed.stderr, options['top']):
+            self.stdout.write(f'  {microseconds / 1000:8.1f} ms  {name}')
+
+        problems = []
+        loaded = sorted(name for name in PARSER_MODULES if name in result['modules'])
+        if loaded:
+            problems.append(f'加载 URL 配置时导入了解析依赖：{", ".join(loaded)}（应在使用时再导入）')
+        if elapsed > options['budget_ms']:
+            problems.append(f'导入时间 {elapsed:.0f} ms 超过预算 {options["budget_ms"]:.0f} ms')
+        if problems:
+            raise CommandError('；'.join(problems))
+        self.stdout.write(self.style.SUCCESS('导入时间检查通过'))
+
+
+def _slowest(report, limit):
+    """解析 -X importtime 的输出，返回自身耗时最多的模块 [(模块, 微秒)]"""
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        entries.append((fields[2].strip(), int(fields[0])))
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    return entries[:limit]
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from converter.bulk import convert_rosters, find_rosters
+from converter.layout import RosterLayout
+from converter.timezones import get_zone
+from converter.validation import WorkbookLimits
+
+
+class Command(BaseCommand):
+    help = '批量把目录或通配符匹配到的排班表转换为 .ics 文件（多进程，未变化的文件自动跳过，可配合 cron 运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='排班表文件、目录或通配符（例如 "/mnt/rosters/**/*.xlsx"）')
+        parser.add_argument('--output-dir', required=True, help='输出目录，每个排班表一个子目录')
+        parser.add_argument('--employee', default='all', help='只转换该员工（名字匹配规则与接口相同），默认 all 为所有员工')
+        parser.add_argument('--all-sheets', action='store_true', help='每个工作表是一周，合并为一个日历')
+        parser.add_argument('--time-zone', help='事件使用的时区，默认 ROSTER_TIME_ZONE')
+        parser.add_argument('--workers', type=int, help='并行的进程数，默认 CPU 核数，1 表示不使用进程池')
+        parser.add_argument('--recursive', action='store_true', help='目录参数包含子目录')
+        parser.add_argument('--manifest', help='清单文件路径，默认为 <输出目录>/.manifest.json')
+        parser.add_argument('--force', action='store_true', help='忽略清单，全部重新转换')
+        parser.add_argument('--summary', help='把 JSON 汇总写入文件，默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if self.verbosity < 2:
+            # 每个日历文件一条的 INFO 日志在 cron 中没有意义，只保留警告
+            logging.getLogger('converter').setLevel(logging.WARNING)
+        time_zone = options['time_zone'] or getattr(settings, 'ROSTER_TIME_ZONE', None)
+        if time_zone:
+            try:
+                get_zone(time_zone)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        paths = find_rosters(options['paths'], recursive=options['recursive'])
+        if not paths:
+            raise CommandError('没有找到排班表（.xlsx / .xls）')
+
+        employee = options['employee'].strip()
+        summary = convert_rosters(
+            paths,
+            options['output_dir'],
+            employee=None if employee.lower() == 'all' else employee,
+            all_sheets=options['all_sheets'],
+            time_zone=time_zone,
+            workers=options['workers'],
+            manifest_path=options['manifest'],
+            force=options['force'],
+            serializer=getattr(settings, 'ICAL_SERIALIZER', 'fast'),
+            include_vtimezone=getattr(settings, 'ICAL_INCLUDE_VTIMEZONE', False),
+            limits=WorkbookLimits.from_settings(),
+            layout=RosterLayout.from_settings(),
+            progress=self.report,
+        )
+        content = json.dumps(summary, indent=2, ensure_ascii=False)
+
+        if options['summary']:
+            with open(options['summary'], 'w', encoding='utf-8') as f:
+                f.write(content + '\n')
+            self.stderr.write(f'汇总已写入 {options["summary"]}')
+        else:
+            self.stdout.write(content)
+
+        failed = summary['counts'].get('failed', 0)
+        if failed:
+            raise CommandError(f'{failed} 个排班表转换失败')
+
+    def report(self, result):
+        """进度写到标准错误，标准输出只留给 JSON 汇总"""
+        if self.verbosity < 1:
+            return
+        line = f"[{result['status']}] {os.path.basename(result['path'])}"
+        if result.get('message'):
+            line += f"：{result['message']}"
+        self.stderr.write(line)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from converter.store import collect_garbage
+
+
+class Command(BaseCommand):
+    help = '按年龄和总大小清理生成的 .ics 文件（可配合 cron 定期运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days',
+            type=float,
+            default=getattr(settings, 'ICS_STORE_MAX_AGE_DAYS', 30),
+            help='删除超过指定天数没有再生成过的文件',
+        )
+        parser.add_argument(
+            '--max-size-mb',
+            type=float,
+            default=getattr(settings, 'ICS_STORE_MAX_SIZE_MB', 200),
+            help='总大小超过上限时，从最久未生成的文件开始删除',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='只统计，不删除文件')
+
+    def handle(self, *args, **options):
+        removed_count, removed_bytes = collect_garbage(
+            max_age=options['max_age_days'] * 86400,
+            max_bytes=int(options['max_size_mb'] * 1024 * 1024),
+            dry_run=options['dry_run'],
+        )
+        action = '将删除' if options['dry_run'] else '已删除'
+        self.stdout.write(f'{action} {removed_count} 个文件，共 {removed_bytes / 1024:.1f} KB')
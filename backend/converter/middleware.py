@@ -0,0 +1,53 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .instrumentation import finish_request_timer, request_durations, start_request_timer
+
+
+@sync_and_async_middleware
+class TimingMiddleware:
+    """为每个 API 请求记录各阶段耗时，写入 Server-Timing 响应头和请求耗时直方图
+
+    同时支持同步和异步：在 ASGI 下不会让 Django 为整个中间件链切换线程，
+    异步视图保持原生执行，记录的耗时也不包含线程切换。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        timer, token = start_request_timer()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request_timer(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        if not request.path.startswith('/api/'):
+            return await self.get_response(request)
+
+        timer, token = start_request_timer()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request_timer(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        if getattr(settings, 'SERVER_TIMING_ENABLED', True):
+            response['Server-Timing'] = timer.server_timing()
+
+        match = getattr(request, 'resolver_match', None)
+        # 按路由名称分组，避免把文件名、令牌等路径参数变成标签
+        request_durations.observe(match.url_name if match and match.url_name else 'unmatched', timer.total())
+        return response
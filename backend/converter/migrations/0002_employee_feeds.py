@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:54
+
+import converter.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_name', models.CharField(max_length=255, unique=True)),
+                ('token', models.CharField(default=converter.models._new_feed_token, max_length=32, unique=True)),
+                ('rendered', models.BinaryField(blank=True, null=True)),
+                ('rendered_hash', models.CharField(blank=True, max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeedWeek',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('events', models.BinaryField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('feed', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weeks', to='converter.employeefeed')),
+            ],
+            options={
+                'ordering': ['week_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedweek',
+            constraint=models.UniqueConstraint(fields=('feed', 'week_start'), name='unique_feed_week'),
+        ),
+    ]
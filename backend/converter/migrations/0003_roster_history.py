@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0002_employee_feeds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterWeek',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('sheet_name', models.CharField(blank=True, max_length=255)),
+                ('week_info', models.CharField(blank=True, max_length=255)),
+                ('week_start', models.DateField(db_index=True)),
+                ('week_end', models.DateField()),
+                ('employees', models.JSONField(default=list)),
+                ('shift_counts', models.JSONField(default=dict)),
+                ('shifts', models.JSONField(default=dict)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='rosterweek',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'week_start'), name='unique_roster_week'),
+        ),
+    ]
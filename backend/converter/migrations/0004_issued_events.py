@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0003_roster_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssuedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_key', models.CharField(max_length=255)),
+                ('uid', models.CharField(max_length=255, unique=True)),
+                ('event_date', models.DateField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('sequence', models.PositiveIntegerField(default=0)),
+                ('dtstamp', models.DateTimeField()),
+                ('cancelled', models.BooleanField(default=False)),
+                ('summary', models.CharField(max_length=255)),
+                ('dtstart', models.DateTimeField()),
+                ('dtend', models.DateTimeField()),
+                ('time_zone', models.CharField(max_length=64)),
+            ],
+            options={
+                'ordering': ['event_date'],
+                'indexes': [models.Index(fields=['employee_key', 'event_date'], name='issued_employee_date')],
+            },
+        ),
+    ]
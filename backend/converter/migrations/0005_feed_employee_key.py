@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+def _normalize_name(name):
+    # 与 converter.names.normalize_name 相同，迁移中不导入应用代码
+    return ' '.join(str(name).split()).casefold()
+
+
+def merge_feeds(apps, schema_editor):
+    """按规范化名字填写 employee_key，同一员工的多个订阅源合并到最早创建的一个
+
+    保留最早的订阅源（已经订阅的链接不变），其余订阅源中它没有的周移过去，
+    同一周取更新时间较晚的内容；显示的名字取最近更新的订阅源。
+    """
+    EmployeeFeed = apps.get_model('converter', 'EmployeeFeed')
+    FeedWeek = apps.get_model('converter', 'FeedWeek')
+
+    groups = {}
+    for feed in EmployeeFeed.objects.order_by('pk'):
+        groups.setdefault(_normalize_name(feed.employee_name), []).append(feed)
+
+    for key, feeds in groups.items():
+        kept, duplicates = feeds[0], feeds[1:]
+        weeks = {week.week_start: week for week in FeedWeek.objects.filter(feed=kept)}
+        for duplicate in duplicates:
+            for week in FeedWeek.objects.filter(feed=duplicate):
+                current = weeks.get(week.week_start)
+                if current is None:
+                    week.feed = kept
+                    week.save(update_fields=['feed'])
+                    weeks[week.week_start] = week
+                elif week.updated_at > current.updated_at:
+                    current.events = week.events
+                    current.content_hash = week.content_hash
+                    current.save(update_fields=['events', 'content_hash'])
+            duplicate.delete()
+
+        latest = max(feeds, key=lambda feed: feed.updated_at)
+        EmployeeFeed.objects.filter(pk=kept.pk).update(
+            employee_key=key,
+            employee_name=latest.employee_name.strip(),
+            rendered=None if duplicates else kept.rendered,
+            rendered_hash='' if duplicates else kept.rendered_hash,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0004_issued_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeefeed',
+            name='employee_key',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='employeefeed',
+            name='employee_name',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.RunPython(merge_feeds, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='employeefeed',
+            name='employee_key',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
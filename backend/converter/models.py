@@ -0,0 +1,123 @@
+import secrets
+import uuid
+
+from django.db import models
+
+
+class ConversionJob(models.Model):
+    """异步转换任务，状态保存在数据库中，任何工作进程都可以查询"""
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FINISHED = 'finished'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '等待中'),
+        (STATUS_RUNNING, '转换中'),
+        (STATUS_FINISHED, '已完成'),
+        (STATUS_FAILED, '失败'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    employee_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    message = models.CharField(max_length=500, blank=True)
+    result = models.JSONField(null=True, blank=True)  # 与同步转换相同的 download_url / schedule_preview / week_info
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.employee_name} ({self.status})'
+
+
+def _new_feed_token():
+    return secrets.token_urlsafe(18)
+
+
+class EmployeeFeed(models.Model):
+    """员工的日历订阅源，合并所有上传过的排班表"""
+
+    employee_key = models.CharField(max_length=255, unique=True)  # 规范化后的员工名字（names.normalize_name）
+    employee_name = models.CharField(max_length=255)  # 显示的名字，取表中最近一次的写法
+    token = models.CharField(max_length=32, unique=True, default=_new_feed_token)
+    rendered = models.BinaryField(null=True, blank=True)  # 渲染好的 .ics，有新的上传时清空
+    rendered_hash = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.employee_name
+
+
+class FeedWeek(models.Model):
+    """订阅源中某一周已序列化的事件，新的上传只替换它涉及的周"""
+
+    feed = models.ForeignKey(EmployeeFeed, related_name='weeks', on_delete=models.CASCADE)
+    week_start = models.DateField()
+    events = models.BinaryField()  # 该周的 VEVENT 片段
+    content_hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['week_start']
+        constraints = [
+            models.UniqueConstraint(fields=['feed', 'week_start'], name='unique_feed_week'),
+        ]
+
+    def __str__(self):
+        return f'{self.feed.employee_name} {self.week_start}'
+
+
+class RosterWeek(models.Model):
+    """已处理过的排班周，用于推断年份和比较两次上传的差异"""
+
+    content_hash = models.CharField(max_length=64)  # 上传文件内容的 SHA-256
+    sheet_name = models.CharField(max_length=255, blank=True)
+    week_info = models.CharField(max_length=255, blank=True)
+    week_start = models.DateField(db_index=True)
+    week_end = models.DateField()
+    employees = models.JSONField(default=list)  # 按表中顺序的员工名字
+    shift_counts = models.JSONField(default=dict)  # 员工名字 -> 有效班次数
+    shifts = models.JSONField(default=dict)  # 员工名字 -> [[日期, 开始分钟, 结束分钟, 任务]]
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-uploaded_at']
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'week_start'], name='unique_roster_week'),
+        ]
+
+    def __str__(self):
+        return f'{self.week_start} ({self.content_hash[:12]})'
+
+
+class IssuedEvent(models.Model):
+    """已签发给员工的事件，记录内容哈希、SEQUENCE 和 DTSTAMP
+
+    内容不变时再次签发沿用原来的 DTSTAMP 和 SEQUENCE，生成的日历逐字节相同；
+    内容变化或被取消时 SEQUENCE 加一。
+    """
+
+    employee_key = models.CharField(max_length=255)  # 规范化后的员工名字
+    uid = models.CharField(max_length=255, unique=True)
+    event_date = models.DateField()
+    content_hash = models.CharField(max_length=64)
+    sequence = models.PositiveIntegerField(default=0)
+    dtstamp = models.DateTimeField()  # 当前版本第一次签发的时间
+    cancelled = models.BooleanField(default=False)
+    # 生成取消通知（METHOD:CANCEL）需要的信息
+    summary = models.CharField(max_length=255)
+    dtstart = models.DateTimeField()
+    dtend = models.DateTimeField()
+    time_zone = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ['event_date']
+        indexes = [
+            models.Index(fields=['employee_key', 'event_date'], name='issued_employee_date'),
+        ]
+
+    def __str__(self):
+        return f'{self.employee_key} {self.event_date} ({self.sequence})'
@@ -0,0 +1,149 @@
+"""员工名字索引
+
+每份解析后的排班表只建一次索引：名字统一大小写（casefold）并合并空白，
+查找时依次尝试 完全匹配、前缀匹配（整个名字或其中某个词的开头）、
+编辑距离的模糊匹配，返回按匹配程度排序的候选。
+"""
+from bisect import bisect_left
+
+from django.utils.text import get_valid_filename
+
+EXACT, PREFIX, WORD_PREFIX, FUZZY = 0, 1, 2, 3
+
+
+def normalize_name(name):
+    """'  LULU   Chen ' -> 'lulu chen'"""
+    return ' '.join(str(name).split()).casefold()
+
+
+def numbered_names(names, separator='_'):
+    """按顺序去重：重复的名字依次加上 _2、_3（['a', 'a', 'b'] -> ['a', 'a_2', 'b']）"""
+    result, used = [], set()
+    for base in names:
+        name, number = base, 1
+        while name in used:
+            number += 1
+            name = f'{base}{separator}{number}'
+        used.add(name)
+        result.append(name)
+    return result
+
+
+def calendar_file_names(employees):
+    """每位员工的 .ics 文件名（不含扩展名），同名员工按出现的顺序编号（多工作表模式下员工没有行号）"""
+    return numbered_names(f'schedule_{get_valid_filename(employee.name)}' for employee in employees)
+
+
+def _max_distance(query):
+    """允许的编辑距离：短名字只容忍一个错字，长名字按长度放宽"""
+    return max(1, len(query) // 4)
+
+
+def bounded_edit_distance(a, b, limit):
+    """Levenshtein 距离，超过 limit 时提前返回 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class EmployeeIndex:
+    """按规范化名字索引的员工列表
+
+    employees 为 get_employees() 的结果（records.Employee），
+    同名员工保留表中的先后顺序。
+    """
+
+    def __init__(self, employees):
+        self.employees = list(employees)
+        self._exact = {}  # 规范化名字 -> [员工下标]
+        keys = []  # (名字或名字中某个词开始的后缀, 是否从第一个词开始, 员工下标)
+        for position, employee in enumerate(self.employees):
+            normalized = normalize_name(employee.name)
+            self._exact.setdefault(normalized, []).append(position)
+            words = normalized.split(' ')
+            for start in range(len(words)):
+                keys.append((' '.join(words[start:]), start == 0, position))
+        keys.sort()
+        self._keys = keys
+        self._key_texts = [key[0] for key in keys]
+        self._normalized = [normalize_name(employee.name) for employee in self.employees]
+
+    def __len__(self):
+        return len(self.employees)
+
+    def lookup(self, name, limit=5):
+        """返回排序后的候选 [(匹配级别, 编辑距离, 员工)]，级别越小越准确"""
+        query = normalize_name(name)
+        if not query:
+            return []
+
+        positions = self._exact.get(query)
+        if positions:
+            return [(EXACT, 0, self.employees[position]) for position in positions][:limit]
+
+        matches = {}
+        # 前缀匹配：在排序后的键中二分查找，只扫描以 query 开头的部分
+        index = bisect_left(self._key_texts, query)
+        while index < len(self._keys) and self._key_texts[index].startswith(query):
+            _, is_full_name, position = self._keys[index]
+            level = PREFIX if is_full_name else WORD_PREFIX
+            if level < matches.get(position, (FUZZY + 1,))[0]:
+                matches[position] = (level, 0)
+            index += 1
+
+        if not matches:
+            limit_distance = _max_distance(query)
+            for position, normalized in enumerate(self._normalized):
+                distance = bounded_edit_distance(query, normalized, limit_distance)
+                if distance <= limit_distance:
+                    matches[position] = (FUZZY, distance)
+
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (item[1][0], item[1][1], len(self._normalized[item[0]]), item[0]),
+        )
+        return [(level, distance, self.employees[position]) for position, (level, distance) in ranked[:limit]]
+
+    def exact(self, name):
+        """规范化名字完全相同的第一个员工，不做前缀和模糊匹配；没有时返回 None"""
+        positions = self._exact.get(normalize_name(name))
+        return self.employees[positions[0]] if positions else None
+
+    def find(self, name):
+        """返回唯一确定的员工；没有匹配或有多个同样好的候选时返回 None"""
+        candidates = self.lookup(name)
+        if not candidates:
+            return None
+
+        level, distance, best = candidates[0]
+        if level == EXACT:
+            return best
+
+        # 非完全匹配时，同样好的候选只能是同一个名字（例如不同门店的同名员工行）
+        best_name = normalize_name(best.name)
+        for other_level, other_distance, other in candidates[1:]:
+            if (other_level, other_distance) == (level, distance) and normalize_name(other.name) != best_name:
+                return None
+        return best
+
+    def suggestions(self, name, limit=5):
+        """候选名字，用于“未找到员工”的提示"""
+        names = []
+        for _, _, employee in self.lookup(name, limit=limit):
+            if employee.name not in names:
+                names.append(employee.name)
+        return names
@@ -0,0 +1,16 @@
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class CalendarContentNegotiation(DefaultContentNegotiation):
+    """日历客户端通常只接受 text/calendar
+
+    成功时返回的是日历文件，不经过 DRF 的渲染器；只有出错时才需要渲染，
+    这时退回第一个渲染器（JSON），而不是返回 406。
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return (renderers[0], renderers[0].media_type)
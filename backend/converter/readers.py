@@ -0,0 +1,127 @@
+"""读取排班表工作表
+
+pandas 和 openpyxl 导入较慢，只在真正读取时才导入，
+下载、订阅和健康检查等不解析 Excel 的请求不需要为它们付出启动时间。
+"""
+import io
+import math
+import time
+
+try:
+    from .layout import HEADER_SCAN_COLUMNS, HEADER_SCAN_ROWS, resolve_layout
+except ImportError:  # 作为脚本直接运行时（见 ical.py）
+    from layout import HEADER_SCAN_COLUMNS, HEADER_SCAN_ROWS, resolve_layout
+
+
+def open_source(source):
+    """把文件路径、字节内容或文件对象统一为可读取的对象
+
+    字节内容每次都包装成新的 BytesIO；文件对象回到开头，便于重复读取。
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def list_sheet_names(source):
+    """列出工作簿中所有工作表的名字（只读模式，不解析单元格）"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(open_source(source), read_only=True, keep_links=False)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def read_roster_pandas(source, sheet_name=0):
+    """用 pandas 读取整张工作表（不使用默认的header）
+
+    source 可以是文件路径、字节内容或文件对象，下同。
+    """
+    import pandas as pd
+
+    return pd.read_excel(open_source(source), sheet_name=sheet_name, header=None)
+
+
+def portable_source(source):
+    """可以传给子进程的上传内容：文件对象读取为字节，文件路径和字节内容不变"""
+    if hasattr(source, 'read'):
+        return open_source(source).read()
+    return source
+
+
+def read_roster_streaming(source, sheet_name=None, layout=None, blank_row_limit=20, max_rows=None, deadline=None):
+    """以只读模式逐行读取排班表，只保留布局用到的列
+
+    - layout 为 None 时先读取前 HEADER_SCAN_ROWS 行识别布局（按表头指纹缓存，见 layout.py）
+    - 只读取布局用到的列（周信息、日期行和各天的 开始/结束/任务）
+    - 不加载样式，按行迭代，内存占用与行数成正比
+    - 员工名字列连续 blank_row_limit 行为空时认为员工区域结束，停止读取
+    - 最多读取 max_rows 行；超过 deadline（time.monotonic() 的值）时抛出 TimeoutError
+
+    返回 (DataFrame, RosterLayout)。DataFrame 与 pd.read_excel(header=None) 结构相同，
+    get_week_info / get_days_info / get_employees 等方法可以直接使用。
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(open_source(source), read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_name is None or sheet_name == 0:
+            worksheet = workbook.worksheets[0]
+        else:
+            worksheet = workbook[sheet_name]
+
+        if layout is None:
+            scan_rows = HEADER_SCAN_ROWS if max_rows is None else min(HEADER_SCAN_ROWS, max_rows)
+            header = [
+                [_convert_cell(value) for value in row]
+                for row in worksheet.iter_rows(max_row=scan_rows, max_col=HEADER_SCAN_COLUMNS, values_only=True)
+            ]
+            layout = resolve_layout(header)
+
+        max_column = layout.max_column
+        rows = []
+        blank_rows = 0
+        for index, row in enumerate(worksheet.iter_rows(max_row=max_rows, max_col=max_column, values_only=True)):
+            if deadline is not None and index % 100 == 0 and time.monotonic() > deadline:
+                raise TimeoutError('解析排班表超时')
+
+            values = [_convert_cell(value) for value in row]
+            values += [math.nan] * (max_column - len(values))
+
+            if index >= layout.first_employee_row:
+                if _is_blank(values[layout.name_column]):
+                    blank_rows += 1
+                    if blank_rows >= blank_row_limit:
+                        break
+                else:
+                    blank_rows = 0
+
+            rows.append(values)
+    finally:
+        workbook.close()
+
+    # 与 pandas 一致，去掉末尾的空行
+    while rows and all(_is_blank(value) for value in rows[-1]):
+        rows.pop()
+
+    return pd.DataFrame(rows), layout
+
+
+def _convert_cell(value):
+    """与 pandas 的 openpyxl 读取方式保持一致的单元格转换"""
+    if value is None:
+        return math.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _is_blank(value):
+    if isinstance(value, str):
+        return value.strip() == ''
+    return value is None or (isinstance(value, float) and math.isnan(value))
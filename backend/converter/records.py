@@ -0,0 +1,84 @@
+"""排班表的记录类型
+
+解析后的日期、员工和班次都用带 __slots__ 的 dataclass 保存，时间统一为从零点起的分钟数。
+每个单元格只在 extract_shifts 中解析一次，之后预览、日历生成和命令行的 process()
+都直接使用这些记录；解析缓存中保存的也是它们，比逐条字典占用的内存小得多。
+"""
+from dataclasses import dataclass
+from datetime import date
+
+
+def format_minutes(minutes):
+    """540 -> '09:00'"""
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+@dataclass(slots=True)
+class Day:
+    """排班表第 4 行的一天，例如 "Monday 11/11\""""
+    weekday: str  # 表中写的星期
+    text: str  # 表中写的 日/月
+    day: int
+    month: int
+    column: int  # 当天 开始 列的下标，结束和任务在其后两列
+    year: int = 0  # 由 infer_years 推断后写入
+
+    def to_date(self):
+        """对应的日期；日期本身无效（例如 31/2）时返回 None"""
+        try:
+            return date(self.year, self.month, self.day)
+        except ValueError:
+            return None
+
+
+@dataclass(slots=True, frozen=True)
+class Employee:
+    """员工：单个工作表中有行号；多个工作表合并后按名字区分，记录出现的周数"""
+    name: str
+    row: int | None = None
+    weeks: int = 0
+
+    def as_dict(self):
+        """接口返回的格式：{name, row} 或 {name, weeks}"""
+        result = {'name': self.name}
+        if self.row is not None:
+            result['row'] = self.row
+        if self.weeks:
+            result['weeks'] = self.weeks
+        return result
+
+
+@dataclass(slots=True, frozen=True)
+class Shift:
+    """员工某一天的班次，结束早于开始时跨过午夜"""
+    row: int
+    day_index: int  # 在 days_info 中的下标
+    start: int  # 从零点起的分钟数
+    end: int
+    task: str = ''
+
+    @property
+    def start_time(self):
+        return format_minutes(self.start)
+
+    @property
+    def end_time(self):
+        return format_minutes(self.end)
+
+    def summary(self):
+        """事件标题，例如 "Kitchen 9-17"，没有任务时为 Work"""
+        return f'{self.task or "Work"} {self.start // 60}-{self.end // 60}'
+
+
+def preview_entry(day, shift):
+    """转换接口 schedule_preview 中的一项"""
+    return {
+        'date': day.text,
+        'day': day.day,
+        'month': day.month,
+        'year': day.year,
+        'weekday': day.weekday,
+        'start_time': shift.start_time,
+        'end_time': shift.end_time,
+        'task': shift.task,
+    }
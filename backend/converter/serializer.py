@@ -0,0 +1,199 @@
+"""直接拼接 iCalendar 文本的快速序列化器
+
+排班日历只用到极少的属性（SUMMARY/DTSTART/DTEND/DESCRIPTION），
+不需要为每个事件构造 icalendar 的组件对象再逐层序列化。
+这里按 RFC 5545 的规则直接写出内容行，转义、折行和属性顺序
+与 icalendar 库保持一致，因此两种方式生成的文件逐字节相同。
+"""
+from datetime import datetime, timedelta, timezone
+
+# 与 icalendar 的 Event.canonical_order 相同，其余属性按字母顺序排在后面
+EVENT_CANONICAL_ORDER = (
+    'SUMMARY', 'DTSTART', 'DTEND', 'DURATION', 'DTSTAMP', 'UID',
+    'RECURRENCE-ID', 'SEQUENCE', 'RRULE', 'EXRULE', 'RDATE', 'EXDATE',
+)
+CALENDAR_CANONICAL_ORDER = ('VERSION', 'PRODID', 'CALSCALE', 'METHOD')
+
+LINE_LIMIT = 75
+
+
+def escape_text(text):
+    """转义 TEXT 类型的值（顺序与 icalendar.parser.escape_char 一致）"""
+    return (str(text)
+            .replace('\\N', '\n')
+            .replace('\\', '\\\\')
+            .replace(';', r'\;')
+            .replace(',', r'\,')
+            .replace('\r\n', r'\n')
+            .replace('\n', r'\n'))
+
+
+def fold_line(line):
+    """按 75 个八位字节折行，续行以一个空格开头"""
+    if line.isascii():
+        return '\r\n '.join(line[i:i + LINE_LIMIT - 1] for i in range(0, len(line), LINE_LIMIT - 1))
+
+    parts = []
+    start = 0
+    byte_count = 0
+    for index, char in enumerate(line):
+        char_bytes = len(char.encode('utf-8'))
+        byte_count += char_bytes
+        if byte_count >= LINE_LIMIT:
+            parts.append(line[start:index])
+            start = index
+            byte_count = char_bytes
+    parts.append(line[start:])
+    return '\r\n '.join(parts)
+
+
+def _tzid(dt):
+    tz = dt.tzinfo
+    if tz is None:
+        return None
+    # pytz 时区用 zone，zoneinfo 用 key
+    return getattr(tz, 'zone', None) or getattr(tz, 'key', None) or dt.tzname()
+
+
+def format_datetime(dt):
+    """返回 (参数, 值)，带时区的时间写成 TZID 形式，UTC 写成 Z 后缀"""
+    value = dt.strftime('%Y%m%dT%H%M%S')
+    tzid = _tzid(dt)
+    if tzid is None:
+        return '', value
+    if tzid == 'UTC':
+        return '', value + 'Z'
+    return f';TZID={tzid}', value
+
+
+def _ordered(properties, canonical_order):
+    """按 icalendar 的规则排序：先固定顺序的属性，再按名称排序其余属性"""
+    ranked = {name: index for index, name in enumerate(canonical_order)}
+    return sorted(properties, key=lambda prop: (ranked.get(prop[0], len(ranked)), prop[0]))
+
+
+def _content_line(name, params, value):
+    return fold_line(f'{name}{params}:{value}') + '\r\n'
+
+
+def _format_offset(offset):
+    total = int(offset.total_seconds())
+    sign = '+' if total >= 0 else '-'
+    hours, minutes = divmod(abs(total) // 60, 60)
+    return f'{sign}{hours:02d}{minutes:02d}'
+
+
+def _offset_at(tz, instant):
+    local = instant.astimezone(tz)
+    return local.utcoffset(), local.dst(), local.tzname()
+
+
+def find_transitions(tz, start, end):
+    """找出 [start, end] 区间内时区偏移发生变化的 UTC 时刻
+
+    先按小时扫描，再在变化的那一小时内二分到秒。排班表只覆盖几周，
+    扫描量很小，也不依赖时区库的内部转换表。
+    """
+    transitions = []
+    step = timedelta(hours=1)
+    current = start
+    previous = _offset_at(tz, current)[0]
+    while current < end:
+        following = current + step
+        offset = _offset_at(tz, following)[0]
+        if offset != previous:
+            low, high = current, following
+            while high - low > timedelta(seconds=1):
+                middle = low + (high - low) / 2
+                if _offset_at(tz, middle)[0] == previous:
+                    low = middle
+                else:
+                    high = middle
+            transitions.append(high.replace(microsecond=0))
+            previous = offset
+        current = following
+    return transitions
+
+
+def vtimezone_lines(tzid, tz, first, last):
+    """生成覆盖 first..last 的 VTIMEZONE 组件"""
+    start = first.astimezone(timezone.utc) - timedelta(days=1)
+    end = last.astimezone(timezone.utc) + timedelta(days=1)
+
+    observances = []
+    offset, dst, name = _offset_at(tz, start)
+    # 区间开始时生效的规则，起点写在区间之前，保证覆盖所有事件
+    observances.append((dst, start + offset, offset, offset, name))
+    for instant in find_transitions(tz, start, end):
+        new_offset, new_dst, new_name = _offset_at(tz, instant)
+        observances.append((new_dst, instant + offset, offset, new_offset, new_name))
+        offset = new_offset
+
+    lines = ['BEGIN:VTIMEZONE\r\n', _content_line('TZID', '', tzid)]
+    for dst, local_start, offset_from, offset_to, name in observances:
+        kind = 'DAYLIGHT' if dst else 'STANDARD'
+        lines.append(f'BEGIN:{kind}\r\n')
+        lines.append(_content_line('DTSTART', '', local_start.strftime('%Y%m%dT%H%M%S')))
+        lines.append(_content_line('TZNAME', '', escape_text(name)))
+        lines.append(_content_line('TZOFFSETFROM', '', _format_offset(offset_from)))
+        lines.append(_content_line('TZOFFSETTO', '', _format_offset(offset_to)))
+        lines.append(f'END:{kind}\r\n')
+    lines.append('END:VTIMEZONE\r\n')
+    return lines
+
+
+class FastCalendar:
+    """只支持排班所需属性的轻量日历，接口与 icalendar.Calendar 的常用部分对应"""
+
+    def __init__(self, prodid, version='2.0', include_vtimezone=False):
+        self.properties = [('VERSION', '', version), ('PRODID', '', escape_text(prodid))]
+        self.include_vtimezone = include_vtimezone
+        self.events = []
+        self._timezones = {}
+        self._first = None
+        self._last = None
+
+    def add(self, name, value):
+        """添加日历级的文本属性，例如 X-WR-CALNAME"""
+        self.properties.append((name.upper(), '', escape_text(value)))
+
+    def add_event(self, summary, start, end, description=None, **extra):
+        """添加一个事件，extra 中的属性按 icalendar 的顺序写出"""
+        properties = [('SUMMARY', '', escape_text(summary))]
+        for name, dt in (('DTSTART', start), ('DTEND', end)):
+            params, value = format_datetime(dt)
+            properties.append((name, params, value))
+        if description is not None:
+            properties.append(('DESCRIPTION', '', escape_text(description)))
+        for name, value in extra.items():
+            name = name.upper().replace('_', '-')
+            if isinstance(value, datetime):
+                params, value = format_datetime(value)
+            else:
+                params, value = '', escape_text(value) if isinstance(value, str) else str(value)
+            properties.append((name, params, value))
+
+        lines = ['BEGIN:VEVENT\r\n']
+        lines.extend(_content_line(*prop) for prop in _ordered(properties, EVENT_CANONICAL_ORDER))
+        lines.append('END:VEVENT\r\n')
+        self.events.append(''.join(lines))
+
+        tzid = _tzid(start)
+        if tzid and tzid != 'UTC':
+            self._timezones.setdefault(tzid, start.tzinfo)
+        self._first = start if self._first is None or start < self._first else self._first
+        self._last = end if self._last is None or end > self._last else self._last
+
+    def events_ical(self):
+        """只返回 VEVENT 部分的字节"""
+        return ''.join(self.events).encode('utf-8')
+
+    def to_ical(self):
+        lines = ['BEGIN:VCALENDAR\r\n']
+        lines.extend(_content_line(*prop) for prop in _ordered(self.properties, CALENDAR_CANONICAL_ORDER))
+        if self.include_vtimezone and self._first is not None:
+            for tzid, tz in self._timezones.items():
+                lines.extend(vtimezone_lines(tzid, tz, self._first, self._last))
+        lines.extend(self.events)
+        lines.append('END:VCALENDAR\r\n')
+        return ''.join(lines).encode('utf-8')
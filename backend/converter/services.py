@@ -0,0 +1,325 @@
+import io
+import os
+import zipfile
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
+from rest_framework import status
+
+from .cache import hash_upload, roster_cache
+from .concurrency import ParserBusy, parse_slot
+from .feeds import feed_url, publish_schedule
+from .history import anchor_dates, diff_roster, record_roster
+from .ical import ShiftScheduler
+from .instrumentation import stage
+from .layout import RosterLayout
+from .ledger import delta_calendars, issue_events
+from .names import calendar_file_names
+from .records import preview_entry
+from .timezones import DEFAULT_TIME_ZONE, get_zone
+from .store import is_store_name, save_calendar_bytes, store_path
+from .validation import WorkbookLimits, WorkbookRejected, validate_workbook
+from .workbook import MultiWeekScheduler
+
+
+class ConversionError(Exception):
+    """转换流程中可以直接返回给前端的错误"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST, retry_after=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after  # 秒数，返回 Retry-After 头
+
+    @property
+    def headers(self):
+        if self.retry_after is None:
+            return None
+        return {'Retry-After': str(self.retry_after)}
+
+
+def _cache_key(content_hash, all_sheets):
+    return f'{content_hash}:all-sheets' if all_sheets else content_hash
+
+
+def load_scheduler(excel_file, all_sheets=False, time_zone=None):
+    """加载上传的排班表
+
+    先按文件内容的 SHA-256 查找解析缓存，命中时直接恢复已解析的状态；
+    未命中时先做预检查（见 validation），通过后才读取Excel。
+    预检查和读取占用一个解析名额（见 concurrency），名额已满时返回 503。
+    all_sheets 为 True 时解析工作簿中的所有工作表（每个工作表一周）。
+    time_zone 为事件使用的时区名称，为空时使用 ROSTER_TIME_ZONE。
+    """
+    time_zone = resolve_time_zone(time_zone)
+    scheduler_class = MultiWeekScheduler if all_sheets else ShiftScheduler
+    content_hash = hash_upload(excel_file)
+    snapshot = roster_cache.get(_cache_key(content_hash, all_sheets))
+    if snapshot is not None:
+        return _configure_output(scheduler_class.from_snapshot(snapshot), time_zone)
+
+    try:
+        with parse_slot():
+            scheduler = _parse_upload(excel_file, content_hash, all_sheets)
+    except ParserBusy as e:
+        raise ConversionError(
+            f'当前解析的排班表较多，请在 {e.retry_after} 秒后重试',
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            retry_after=e.retry_after,
+        )
+
+    return _configure_output(scheduler, time_zone)
+
+
+def _parse_upload(excel_file, content_hash, all_sheets):
+    """预检查并读取缓存中没有的排班表"""
+    reader = getattr(settings, 'ROSTER_READER', 'streaming')
+    source = upload_source(excel_file)
+    limits = WorkbookLimits.from_settings()
+    layout = RosterLayout.from_settings()
+    with stage('validate'):
+        try:
+            validate_workbook(source, all_sheets=all_sheets, limits=limits, layout=layout)
+        except WorkbookRejected as e:
+            raise ConversionError(e.message, e.status_code)
+
+    if all_sheets:
+        scheduler = MultiWeekScheduler(
+            source,
+            reader=reader,
+            max_workers=getattr(settings, 'ROSTER_SHEET_WORKERS', None),
+        )
+    else:
+        scheduler = ShiftScheduler(source, reader=reader)
+    scheduler.content_hash = content_hash
+    # 以历史中已处理过的周作为推断年份的参考
+    scheduler.anchor_dates = anchor_dates()
+    scheduler.limits = limits
+    scheduler.layout = layout
+
+    with stage('parse'):
+        try:
+            loaded = scheduler.read_excel()
+        except TimeoutError:
+            raise ConversionError(
+                f'解析排班表超过 {limits.parse_timeout} 秒，请检查文件是否包含大量无关内容',
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if not loaded:
+            raise ConversionError('无法读取Excel文件，请检查文件格式')
+        # 日期在缓存之前按本次的参考日期推断年份，之后命中缓存的请求（例如先获取员工列表、
+        # 再转换）得到相同的年份；失败时由调用方的 get_days_info() 报错
+        scheduler.get_days_info()
+    return scheduler
+
+
+def _configure_output(scheduler, time_zone):
+    """按配置选择日历序列化方式和时区"""
+    scheduler.set_output(
+        getattr(settings, 'ICAL_SERIALIZER', 'fast'),
+        getattr(settings, 'ICAL_INCLUDE_VTIMEZONE', False),
+    )
+    scheduler.set_time_zone(time_zone)
+    return scheduler
+
+
+def resolve_time_zone(time_zone=None):
+    """检查请求中的时区名称（IANA 格式，例如 Pacific/Auckland），为空时使用默认时区"""
+    time_zone = (time_zone or '').strip() or getattr(settings, 'ROSTER_TIME_ZONE', DEFAULT_TIME_ZONE)
+    try:
+        get_zone(time_zone)
+    except ValueError as e:
+        raise ConversionError(str(e))
+    return time_zone
+
+
+def roster_changes(excel_file, all_sheets=False):
+    """上传的排班表与每周上一次上传相比的变化"""
+    scheduler = load_scheduler(excel_file, all_sheets=all_sheets)
+
+    if not scheduler.get_week_info():
+        raise ConversionError('无法获取周信息，请检查Excel文件格式')
+
+    if not scheduler.get_days_info():
+        raise ConversionError('无法获取日期信息，请检查Excel文件格式')
+
+    weeks = diff_roster(scheduler)
+    remember_scheduler(scheduler)
+    return weeks
+
+
+def upload_source(excel_file):
+    """返回可以直接交给 ShiftScheduler 读取的上传内容
+
+    超过 FILE_UPLOAD_MAX_MEMORY_SIZE 的上传已经由 TemporaryFileUploadHandler
+    写到磁盘，直接使用它的路径；其余上传本来就在内存中，直接读取字节，
+    不再经过额外的临时文件。
+    """
+    if hasattr(excel_file, 'temporary_file_path'):
+        return excel_file.temporary_file_path()
+
+    excel_file.seek(0)
+    return excel_file.read()
+
+
+def remember_scheduler(scheduler):
+    """把解析结果（含已计算的周信息、日期和员工列表）写回缓存"""
+    all_sheets = isinstance(scheduler, MultiWeekScheduler)
+    roster_cache.set(_cache_key(scheduler.content_hash, all_sheets), scheduler.snapshot())
+
+
+def list_employees(excel_file, all_sheets=False):
+    """获取上传排班表中的员工列表（接口返回的字典格式）"""
+    scheduler = load_scheduler(excel_file, all_sheets=all_sheets)
+
+    employees = scheduler.get_employees()
+    remember_scheduler(scheduler)
+
+    if not employees:
+        raise ConversionError('未找到员工信息')
+
+    return [employee.as_dict() for employee in employees]
+
+
+def inspect_upload(excel_file, all_sheets=False):
+    """解析上传的排班表，返回员工列表和周信息"""
+    scheduler = load_scheduler(excel_file, all_sheets=all_sheets)
+
+    if not scheduler.get_week_info():
+        raise ConversionError('无法获取周信息，请检查Excel文件格式')
+
+    employees = scheduler.get_employees()
+    remember_scheduler(scheduler)
+
+    if not employees:
+        raise ConversionError('未找到员工信息')
+
+    return {
+        'employees': [employee.as_dict() for employee in employees],
+        'week_info': scheduler.week_info,
+    }
+
+
+def convert_upload(excel_file, employee_name, all_sheets=False, time_zone=None, delta=False):
+    """转换指定员工的排班：解析（或命中缓存）、生成预览和日历并保存
+
+    返回 download_url / schedule_preview / week_info，失败时抛出 ConversionError。
+    delta 为 True 时另外返回与上一次签发相比的增量日历（见 ledger）。
+    """
+    scheduler = load_scheduler(excel_file, all_sheets=all_sheets, time_zone=time_zone)
+
+    if not scheduler.get_week_info():
+        raise ConversionError('无法获取周信息，请检查Excel文件格式')
+
+    if not scheduler.get_days_info():
+        raise ConversionError('无法获取日期信息，请检查Excel文件格式')
+
+    employee_row = scheduler.find_employee_row(employee_name)
+    if employee_row is None:
+        candidates = scheduler.employee_candidates(employee_name)
+        if candidates:
+            raise ConversionError(f"未找到该员工的排班信息，您是否要找：{'、'.join(candidates)}")
+        raise ConversionError('未找到该员工的排班信息')
+
+    # 获取排班预览数据
+    with stage('extract'):
+        shifts = scheduler.get_employee_shifts(employee_row)
+    schedule_preview = [preview_entry(day_info, shift) for day_info, shift in shifts]
+
+    # 与上一次签发比较，内容不变的事件沿用原来的 DTSTAMP 和 SEQUENCE
+    with stage('issue'):
+        issued = issue_events(scheduler, [employee_row])[employee_row]
+
+    with stage('build'):
+        cal = scheduler.create_calendar(employee_row, issued['stamps'])
+    remember_scheduler(scheduler)
+    record_roster(scheduler)
+
+    # 保存iCal文件
+    download_url = save_employee_calendar(cal, employee_name)
+
+    # 更新该员工的订阅源（只替换本次上传涉及的周）
+    with stage('publish'):
+        feed = publish_schedule(scheduler, employee_row, issued['stamps'])
+
+    result = {
+        'download_url': download_url,
+        'feed_url': feed_url(feed),
+        'schedule_preview': schedule_preview,
+        'week_info': scheduler.week_info
+    }
+    if delta:
+        result['delta'] = delta_result(scheduler, employee_name, employee_row, issued)
+    return result
+
+
+def delta_result(scheduler, employee_name, employee_row, issued):
+    """增量更新：新增/修改/取消的事件数量，以及对应日历的下载链接（没有时为 None）"""
+    with stage('build'):
+        publish, cancel = delta_calendars(scheduler, employee_row, issued)
+    return {
+        'added': len(issued['added']),
+        'changed': len(issued['changed']),
+        'cancelled': len(issued['cancelled']),
+        'publish_url': save_employee_calendar(publish, f'{employee_name}_updates') if publish is not None else None,
+        'cancel_url': save_employee_calendar(cancel, f'{employee_name}_cancelled') if cancel is not None else None,
+    }
+
+
+def resolve_download_path(filename):
+    """返回已生成日历文件的路径，文件不存在时返回 None
+
+    内容寻址的文件在 media/calendars 下，旧版本生成的文件仍直接在 MEDIA_ROOT 下。
+    """
+    if is_store_name(filename):
+        file_path = store_path(filename)
+    else:
+        file_path = os.path.join(settings.MEDIA_ROOT, filename)
+    if not os.path.exists(file_path):
+        return None
+    return file_path
+
+
+def download_filename(filename, requested_name=None):
+    """下载时使用的文件名：优先使用下载链接中的 name 参数，只保留安全字符"""
+    if requested_name:
+        try:
+            name = get_valid_filename(requested_name)
+        except SuspiciousFileOperation:
+            return filename
+        return name if name.endswith('.ics') else f'{name}.ics'
+    return filename
+
+
+def is_truthy(value):
+    """表单中的布尔参数（true / 1 / yes / on）"""
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def save_employee_calendar(cal, employee_name):
+    """按内容哈希保存员工日历（相同内容只保存一份），返回下载链接"""
+    try:
+        with stage('serialize'):
+            content = cal.to_ical()
+        with stage('write'):
+            stored_name = save_calendar_bytes(content)
+    except Exception as e:
+        raise ConversionError(f'保存iCal文件失败: {str(e)}', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # 下载时使用的文件名
+    download_name = f"schedule_{get_valid_filename(employee_name)}.ics"
+    return f'/api/download/{stored_name}/?{urlencode({"name": download_name})}'
+
+
+def build_calendar_archive(calendars):
+    """把 [(员工信息, 日历)] 打包为 zip，每位员工一个 .ics 文件"""
+    buffer = io.BytesIO()
+    names = calendar_file_names(employee for employee, _ in calendars)
+
+    with stage('serialize'), zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, (_, cal) in zip(names, calendars):
+            archive.writestr(f'{name}.ics', cal.to_ical())
+
+    return buffer.getvalue()
@@ -0,0 +1,126 @@
+"""按内容哈希保存生成的 .ics 文件
+
+文件名是日历内容的 SHA-256，内容相同的日历只保存一份；
+重复转换时只刷新文件的修改时间，不再写盘。
+修改时间同时表示“最近一次生成”，清理时按它判断文件年龄。
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
+
+STORE_DIRNAME = 'calendars'
+STORE_NAME_RE = re.compile(r'^[0-9a-f]{64}\.ics$')
+
+
+def store_root():
+    return os.path.join(settings.MEDIA_ROOT, STORE_DIRNAME)
+
+
+def is_store_name(filename):
+    return bool(STORE_NAME_RE.match(filename))
+
+
+def store_path(filename):
+    """按哈希前两位分子目录，避免单个目录下文件过多"""
+    return os.path.join(store_root(), filename[:2], filename)
+
+
+def save_calendar_bytes(content):
+    """保存日历内容，返回存储文件名（<sha256>.ics）"""
+    filename = f'{hashlib.sha256(content).hexdigest()}.ics'
+    path = store_path(filename)
+
+    if os.path.exists(path):
+        # 已有相同内容的文件，只刷新修改时间
+        os.utime(path)
+        return filename
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    # 先写临时文件再改名，并发写入同一内容时也不会读到半个文件
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return filename
+
+
+def _stored_files():
+    """返回 [(路径, 修改时间, 大小)]，包括旧版本直接写在 MEDIA_ROOT 下的 .ics 文件"""
+    files = []
+    roots = [(store_root(), True), (settings.MEDIA_ROOT, False)]
+    for root, recursive in roots:
+        if not os.path.isdir(root):
+            continue
+        if recursive:
+            paths = (
+                os.path.join(directory, name)
+                for directory, _, names in os.walk(root)
+                for name in names
+            )
+        else:
+            paths = (os.path.join(root, name) for name in os.listdir(root))
+
+        for path in paths:
+            if not path.endswith(('.ics', '.tmp')) or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((path, stat.st_mtime, stat.st_size))
+    return files
+
+
+def collect_garbage(max_age=None, max_bytes=None, dry_run=False):
+    """按保留策略清理日历文件
+
+    - max_age：超过该秒数没有再生成过的文件被删除
+    - max_bytes：总大小超过上限时，从最久未生成的文件开始删除
+    返回 (删除的文件数, 释放的字节数)。
+    """
+    now = time.time()
+    files = sorted(_stored_files(), key=lambda item: item[1])
+    total_bytes = sum(size for _, _, size in files)
+    removed_count = 0
+    removed_bytes = 0
+
+    for path, mtime, size in files:
+        expired = max_age is not None and now - mtime > max_age
+        oversized = max_bytes is not None and total_bytes > max_bytes
+        if not expired and not oversized:
+            continue
+
+        if not dry_run:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        total_bytes -= size
+        removed_count += 1
+        removed_bytes += size
+
+    if not dry_run:
+        _remove_empty_directories()
+
+    return removed_count, removed_bytes
+
+
+def _remove_empty_directories():
+    root = store_root()
+    if not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        directory = os.path.join(root, name)
+        if os.path.isdir(directory) and not os.listdir(directory):
+            os.rmdir(directory)
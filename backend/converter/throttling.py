@@ -0,0 +1,78 @@
+"""上传接口的限流
+
+按客户端（IP，经过代理时按 NUM_PROXIES 取 X-Forwarded-For）的令牌桶：
+桶的容量为 UPLOAD_THROTTLE_BURST，按 UPLOAD_THROTTLE_RATE（例如 '30/min'）匀速补充，
+每次上传消耗一个令牌（批量上传按文件数）。令牌不足时返回 429 和 Retry-After。
+
+桶的状态保存在 UPLOAD_THROTTLE_CACHE 指定的缓存中（默认为本地内存缓存 throttle），
+只在本进程内计数，不需要额外的服务，也不会给每个请求增加网络往返。
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# 本地内存缓存的读写不是原子的，同一进程内的更新需要加锁
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'30/min' -> 每秒补充的令牌数；None 或空字符串表示不限流"""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count) / _PERIODS[period.strip()[0]]
+
+
+def throttled_message(wait=None):
+    """限流时返回给前端的提示，wait 为需要等待的秒数（向上取整）"""
+    if wait is None:
+        return '上传过于频繁，请稍后重试'
+    return f'上传过于频繁，请在 {wait} 秒后重试'
+
+
+class UploadRateThrottle(BaseThrottle):
+    """上传接口按客户端的令牌桶限流
+
+    视图可以定义 throttle_cost(request) 返回本次请求消耗的令牌数，默认为 1。
+    """
+    cache_prefix = 'upload-throttle'
+
+    def __init__(self):
+        self.rate = parse_rate(getattr(settings, 'UPLOAD_THROTTLE_RATE', '30/min'))
+        self.burst = max(getattr(settings, 'UPLOAD_THROTTLE_BURST', 10), 1)
+        self.cache = caches[getattr(settings, 'UPLOAD_THROTTLE_CACHE', 'default')]
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        cost_function = getattr(view, 'throttle_cost', None)
+        # 超过容量的请求在桶满时放行，否则永远无法通过
+        cost = min(cost_function(request) if cost_function else 1, self.burst)
+        return self.consume(f'{self.cache_prefix}:{self.get_ident(request)}', cost)
+
+    def consume(self, key, cost=1):
+        """从 key 的桶中取出 cost 个令牌，不足时记录需要等待的秒数并返回 False"""
+        now = time.time()
+        # 桶补满所需的时间之后条目可以过期，没有条目就是满的桶
+        timeout = math.ceil(self.burst / self.rate) + 1
+        with _lock:
+            tokens, updated = self.cache.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            else:
+                self.wait_seconds = (cost - tokens) / self.rate
+            self.cache.set(key, (tokens, now), timeout)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,103 @@
+"""时区与本地时间
+
+时区使用标准库 zoneinfo，按名称缓存。每个排班周计算一次 UTC 偏移表：
+表中记录这段时间每个本地日期的偏移，当天没有夏令时切换时直接构造带时区的时间，
+只有切换当天才逐个判断不存在（跳过的一小时）或重复（回拨的一小时）的本地时间。
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_TIME_ZONE = 'Pacific/Auckland'
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """按名称返回 ZoneInfo，名称无效时抛出 ValueError
+
+    "America" 这样的目录名和过长的名称会抛出 IsADirectoryError 等 OSError，
+    其中带有服务器上 zoneinfo 的路径，同样只报告为无效的时区。
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError, OSError):
+        raise ValueError(f'无效的时区: {name}') from None
+
+
+class OffsetTable:
+    """一段连续日期内每个本地日期的 UTC 偏移
+
+    offsets[i] 为第 i 天的偏移；当天发生夏令时切换时为 None。
+    """
+
+    def __init__(self, zone, first_day, days):
+        self.zone = zone
+        self.first_day = first_day
+        self.offsets = []
+        for index in range(days):
+            day = first_day + timedelta(days=index)
+            start = datetime(day.year, day.month, day.day, tzinfo=zone).utcoffset()
+            following = day + timedelta(days=1)
+            end = datetime(following.year, following.month, following.day, tzinfo=zone).utcoffset()
+            self.offsets.append(start if start == end else None)
+
+    def offset(self, day):
+        index = (day - self.first_day).days
+        if 0 <= index < len(self.offsets):
+            return self.offsets[index]
+        return None
+
+    def localize_shift(self, day, start, end):
+        """班次（当天零点起的开始、结束分钟）的本地开始、结束时间
+
+        结束分钟小于开始分钟时班次跨过午夜，结束于第二天；按表中的分钟判断，
+        不受换算后时间的影响（开始时间落在跳过的时段时会被顺延）。
+        开始时间被顺延到结束时间之后时（例如 Pacific/Auckland 2026-09-27 的 02:30–03:20，
+        开始顺延为 03:30），结束时间按表中的时长从开始时间算起。
+        """
+        start_dt = self.localize(day, start)
+        end_day = day + timedelta(days=1) if end < start else day
+        end_dt = self.localize(end_day, end, after=start_dt)
+        if end_dt.astimezone(timezone.utc) <= start_dt.astimezone(timezone.utc):
+            end_dt = (start_dt.astimezone(timezone.utc) + timedelta(minutes=end - start)).astimezone(self.zone)
+        return start_dt, end_dt
+
+    def localize(self, day, minutes, after=None):
+        """day 当天零点起第 minutes 分钟的本地时间
+
+        after 为同一班次的开始时间：回拨的重复时段中选择晚于开始时间的那一次。
+        """
+        hour, minute = divmod(minutes, 60)
+        local = datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.zone)
+        if self.offset(day) is not None:
+            return local
+
+        # 切换当天：跳过的时段换算为实际时刻（与 RFC 5545 的解释一致）
+        utc = local.astimezone(timezone.utc)
+        actual = utc.astimezone(self.zone)
+        if actual.replace(tzinfo=None) != local.replace(tzinfo=None):
+            return actual
+
+        # 重复的时段默认取第一次，结束时间取晚于开始的那一次
+        # 同一时区的时间比较会忽略 fold，这里统一换算为 UTC 比较
+        if after is not None and utc <= after.astimezone(timezone.utc):
+            later = local.replace(fold=1)
+            if later.astimezone(timezone.utc) > after.astimezone(timezone.utc):
+                return later
+        return local
+
+
+@lru_cache(maxsize=256)
+def offset_table(zone_name, first_day, days):
+    """按（时区, 起始日期, 天数）缓存偏移表，同一排班周只计算一次"""
+    return OffsetTable(get_zone(zone_name), first_day, days)
+
+
+def week_offset_table(zone_name, days_info):
+    """覆盖排班周所有日期（以及跨午夜班次的第二天）的偏移表"""
+    dates = [day_info.to_date() for day_info in days_info]
+    dates = [value for value in dates if value is not None]
+    if not dates:
+        return None
+    first_day = min(dates)
+    return offset_table(zone_name, first_day, (max(dates) - first_day).days + 2)
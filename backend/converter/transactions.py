@@ -0,0 +1,25 @@
+"""先读后写的事务
+
+SQLite 不支持 select_for_update，事务中先读后写时如果另一个连接已经开始写入，
+升级写锁会直接失败（database is locked），不会等待 busy timeout。
+批量上传和后台任务会在多个线程中同时转换，这类事务在 SQLite 下用进程内的锁串行执行；
+其他数据库仍依靠行锁。
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+_sqlite_lock = threading.Lock()
+
+
+@contextmanager
+def write_transaction():
+    """transaction.atomic()，SQLite 下同一进程内串行执行"""
+    if connection.vendor != 'sqlite':
+        with transaction.atomic():
+            yield
+        return
+
+    with _sqlite_lock, transaction.atomic():
+        yield
@@ -1,8 +1,20 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('employees/', views.GetEmployeesView.as_view(), name='get_employees'),
     path('convert/', views.ConvertExcelToICalView.as_view(), name='convert_excel'),
+    path('convert-all/', views.ConvertAllEmployeesView.as_view(), name='convert_all'),
+    path('batch/', views.BatchUploadView.as_view(), name='batch_upload'),
+    path('roster-diff/', views.RosterDiffView.as_view(), name='roster_diff'),
+    path('jobs/<uuid:job_id>/', views.ConversionJobView.as_view(), name='conversion_job'),
     path('download/<str:filename>/', views.DownloadICalView.as_view(), name='download_ical'),
+    path('feeds/<str:token>.ics', views.EmployeeFeedView.as_view(), name='employee_feed'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+    path('health/', views.HealthView.as_view(), name='health'),
+
+    # 原生异步版本（需要通过 ASGI 部署才能发挥作用）
+    path('async/employees/', async_views.get_employees, name='async_get_employees'),
+    path('async/convert/', async_views.convert_excel, name='async_convert_excel'),
+    path('async/download/<str:filename>/', async_views.download_ical, name='async_download_ical'),
 ] 
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""排班表的预检查
+
+完整解析之前先做几项廉价的检查，尽早拒绝异常的上传：
+
+- zip 中央目录：成员数量、解压后的总大小和压缩比（防止 zip 炸弹），不解压任何内容；
+- 工作表的 <dimension>：已使用区域的行数和列数（只读取工作表 XML 的开头）；
+- 表头：按布局（默认 B1/B2 的周信息和第 4 行的日期）检查，只读取前几行。
+
+.xls（OLE2 格式）没有这些结构，只检查文件签名，交给 pandas 读取。
+"""
+import zipfile
+
+from django.conf import settings
+from rest_framework import status
+
+from .layout import DAY_PATTERN, HEADER_SCAN_COLUMNS, HEADER_SCAN_ROWS, layout_cache
+from .readers import open_source
+
+_OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# 压缩比只对解压后超过该大小的成员检查，小的 XML 本来就压缩得很好
+_RATIO_MIN_BYTES = 1024 * 1024
+
+
+class WorkbookRejected(Exception):
+    """上传的工作簿没有通过预检查"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class WorkbookLimits:
+    """预检查和解析的资源限制，默认值来自 settings"""
+
+    def __init__(self, max_rows=2000, max_columns=200, max_uncompressed_bytes=50 * 1024 * 1024,
+                 max_compression_ratio=100, max_sheets=60, parse_timeout=10):
+        self.max_rows = max_rows
+        self.max_columns = max_columns
+        self.max_uncompressed_bytes = max_uncompressed_bytes
+        self.max_compression_ratio = max_compression_ratio
+        self.max_sheets = max_sheets
+        self.parse_timeout = parse_timeout  # 解析的时间上限（秒），None 表示不限制
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_rows=getattr(settings, 'ROSTER_MAX_ROWS', 2000),
+            max_columns=getattr(settings, 'ROSTER_MAX_COLUMNS', 200),
+            max_uncompressed_bytes=getattr(settings, 'ROSTER_MAX_UNCOMPRESSED_MB', 50) * 1024 * 1024,
+            max_compression_ratio=getattr(settings, 'ROSTER_MAX_COMPRESSION_RATIO', 100),
+            max_sheets=getattr(settings, 'ROSTER_MAX_SHEETS', 60),
+            parse_timeout=getattr(settings, 'ROSTER_PARSE_TIMEOUT', 10),
+        )
+
+
+def _too_large(message):
+    return WorkbookRejected(message, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+
+def check_archive(source, limits):
+    """检查 zip 中央目录，返回 False 表示不是 zip（可能是 .xls）"""
+    try:
+        archive = zipfile.ZipFile(open_source(source))
+    except zipfile.BadZipFile:
+        return False
+
+    with archive:
+        members = archive.infolist()
+        # 正常的 .xlsx 只有几十个成员
+        if len(members) > limits.max_sheets * 4 + 100:
+            raise _too_large(f'工作簿包含的部件过多（{len(members)} 个）')
+
+        total = sum(member.file_size for member in members)
+        if total > limits.max_uncompressed_bytes:
+            raise _too_large(
+                f'工作簿解压后过大（{total // (1024 * 1024)} MB），'
+                f'上限为 {limits.max_uncompressed_bytes // (1024 * 1024)} MB'
+            )
+
+        for member in members:
+            if member.file_size < _RATIO_MIN_BYTES:
+                continue
+            if member.file_size > max(member.compress_size, 1) * limits.max_compression_ratio:
+                raise _too_large(f'工作簿中的 {member.filename} 压缩比异常，拒绝处理')
+    return True
+
+
+def has_roster_header(worksheet, layout=None):
+    """周信息单元格不为空，且日期行中至少有一个 "Monday 11/11" 格式的日期
+
+    layout 为 None 时按前几行识别布局（结果进入布局缓存，之后解析同一模板时直接命中）。
+    """
+    max_column = HEADER_SCAN_COLUMNS if layout is None else max(HEADER_SCAN_COLUMNS, layout.max_column)
+    rows = [list(row) for row in worksheet.iter_rows(
+        min_row=1, max_row=HEADER_SCAN_ROWS, max_col=max_column, values_only=True)]
+    if layout is None:
+        layout = layout_cache.resolve(rows)
+        if layout is None:
+            return False
+    if len(rows) <= layout.date_row:
+        return False
+
+    def cell(row, column):
+        values = rows[row] if row < len(rows) else ()
+        value = values[column] if column < len(values) else None
+        return '' if value is None else str(value).strip()
+
+    if not any(cell(row, column) for row, column in layout.week_cells):
+        return False
+    return any(DAY_PATTERN.search(cell(layout.date_row, column)) for column in layout.day_columns)
+
+
+def check_worksheet(worksheet, limits):
+    """按 <dimension> 检查已使用区域；没有写出 dimension 的工作表由解析时的行数上限兜底"""
+    rows, columns = worksheet.max_row, worksheet.max_column
+    if rows is not None and rows > limits.max_rows:
+        raise _too_large(f'工作表 {worksheet.title} 的行数过多（{rows} 行），上限为 {limits.max_rows} 行')
+    if columns is not None and columns > limits.max_columns:
+        raise _too_large(f'工作表 {worksheet.title} 的列数过多（{columns} 列），上限为 {limits.max_columns} 列')
+
+
+def validate_workbook(source, all_sheets=False, limits=None, layout=None):
+    """完整解析前的预检查，不通过时抛出 WorkbookRejected
+
+    all_sheets 为 False 时只检查第一个工作表（单周模式只读取它），
+    为 True 时检查所有工作表，其中至少一个需要有排班表的表头。
+    layout 为配置的布局，None 表示按表头自动识别。
+    """
+    from openpyxl import load_workbook
+
+    limits = limits or WorkbookLimits.from_settings()
+
+    if not check_archive(source, limits):
+        if _signature(source) == _OLE2_SIGNATURE:
+            return
+        raise WorkbookRejected('无法读取Excel文件，请检查文件格式')
+
+    try:
+        workbook = load_workbook(open_source(source), read_only=True, data_only=True, keep_links=False)
+    except Exception:
+        raise WorkbookRejected('无法读取Excel文件，请检查文件格式')
+
+    try:
+        worksheets = workbook.worksheets if all_sheets else workbook.worksheets[:1]
+        if not worksheets:
+            raise WorkbookRejected('工作簿中没有工作表')
+        if len(worksheets) > limits.max_sheets:
+            raise _too_large(f'工作表过多（{len(worksheets)} 个），上限为 {limits.max_sheets} 个')
+
+        for worksheet in worksheets:
+            check_worksheet(worksheet, limits)
+
+        if not any(has_roster_header(worksheet, layout) for worksheet in worksheets):
+            raise WorkbookRejected('不是排班表格式：没有找到周信息和日期行（例如 Monday 11/11）')
+    finally:
+        workbook.close()
+
+
+def _signature(source):
+    """文件开头的 8 个字节"""
+    if isinstance(source, str):
+        with open(source, 'rb') as handle:
+            return handle.read(len(_OLE2_SIGNATURE))
+    return open_source(source).read(len(_OLE2_SIGNATURE))
@@ -1,17 +1,42 @@
-import os
 import traceback
 from django.conf import settings
+from django.utils.text import get_valid_filename
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser
-from django.http import FileResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from datetime import datetime
-import tempfile
 
-from .ical import ShiftScheduler
+from .services import (
+    ConversionError,
+    build_calendar_archive,
+    convert_upload,
+    download_filename,
+    is_truthy,
+    list_employees,
+    load_scheduler,
+    remember_scheduler,
+    resolve_download_path,
+    resolve_time_zone,
+    roster_changes,
+    save_employee_calendar,
+)
+from .batch import stream_batch
+from .history import record_roster
+from .downloads import calendar_content_response, calendar_download_response
+from .feeds import publish_all_schedules, render_feed
+from .instrumentation import render_metrics, stage
+from .jobs import submit_conversion_job
+from .ledger import issue_events
+from .models import ConversionJob, EmployeeFeed
+from .negotiation import CalendarContentNegotiation
+from .throttling import UploadRateThrottle
+from .warmup import is_preloaded
 
 class GetEmployeesView(APIView):
+    throttle_classes = (UploadRateThrottle,)
+
     def post(self, request):
         try:
             # 检查是否有文件上传
@@ -30,36 +55,9 @@ class GetEmployeesView(APIView):
                     'message': '请上传Excel文件（.xlsx或.xls格式）'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # 创建临时文件来保存上传的Excel
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_excel:
-                    for chunk in excel_file.chunks():
-                        temp_excel.write(chunk)
-                    temp_excel_path = temp_excel.name
-            except Exception as e:
-                return Response({
-                    'error': True,
-                    'message': f'保存临时文件失败: {str(e)}'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            try:
-                # 使用转换类处理文件
-                scheduler = ShiftScheduler(temp_excel_path)
-                
-                if not scheduler.read_excel():
-                    return Response({
-                        'error': True,
-                        'message': '无法读取Excel文件，请检查文件格式'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-
-                # 获取员工列表
-                employees = scheduler.get_employees()
-                
-                if not employees:
-                    return Response({
-                        'error': True,
-                        'message': '未找到员工信息'
-                    }, status=status.HTTP_400_BAD_REQUEST)
+                # 使用转换类处理文件（相同内容的文件直接复用解析缓存）
+                employees = list_employees(excel_file, all_sheets=is_truthy(request.data.get('all_sheets', '')))
 
                 # 返回员工列表
                 return Response({
@@ -67,18 +65,17 @@ class GetEmployeesView(APIView):
                     'employees': employees
                 }, status=status.HTTP_200_OK)
 
+            except ConversionError as e:
+                return Response({
+                    'error': True,
+                    'message': e.message
+                }, status=e.status_code, headers=e.headers)
             except Exception as e:
                 return Response({
                     'error': True,
                     'message': f'处理文件时出错: {str(e)}',
                     'detail': traceback.format_exc()
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            finally:
-                # 清理临时文件
-                try:
-                    os.unlink(temp_excel_path)
-                except:
-                    pass
 
         except Exception as e:
             return Response({
@@ -89,6 +86,7 @@ class GetEmployeesView(APIView):
 
 class ConvertExcelToICalView(APIView):
     parser_classes = (MultiPartParser,)
+    throttle_classes = (UploadRateThrottle,)
 
     def post(self, request):
         try:
@@ -115,98 +113,159 @@ class ConvertExcelToICalView(APIView):
                     'message': '请上传Excel文件（.xlsx或.xls格式）'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # 创建临时文件来保存上传的Excel
+            all_sheets = is_truthy(request.data.get('all_sheets', ''))
+            time_zone = request.data.get('time_zone')
+            delta = is_truthy(request.data.get('delta', ''))
+
+            # 异步模式：立即返回任务ID，由后台线程完成转换
+            if is_truthy(request.data.get('async', '')):
+                try:
+                    resolve_time_zone(time_zone)
+                except ConversionError as e:
+                    return Response({
+                        'error': True,
+                        'message': e.message
+                    }, status=e.status_code, headers=e.headers)
+                job = submit_conversion_job(excel_file, employee_name, all_sheets=all_sheets, time_zone=time_zone, delta=delta)
+                return Response({
+                    'error': False,
+                    'message': '转换任务已提交',
+                    'job_id': str(job.id),
+                    'status_url': f'/api/jobs/{job.id}/'
+                }, status=status.HTTP_202_ACCEPTED)
+
+            # 使用转换类处理文件
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as temp_excel:
-                    for chunk in excel_file.chunks():
-                        temp_excel.write(chunk)
-                    temp_excel_path = temp_excel.name
+                result = convert_upload(excel_file, employee_name, all_sheets=all_sheets, time_zone=time_zone, delta=delta)
+            except ConversionError as e:
+                return Response({
+                    'error': True,
+                    'message': e.message
+                }, status=e.status_code, headers=e.headers)
             except Exception as e:
                 return Response({
                     'error': True,
-                    'message': f'保存临时文件失败: {str(e)}'
+                    'message': f'处理文件时出错: {str(e)}',
+                    'detail': traceback.format_exc()
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # 生成输出文件名
-            output_filename = f"schedule_{employee_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ics"
-            output_path = os.path.join(settings.MEDIA_ROOT, output_filename)
+            # 返回成功响应，包含排班预览数据
+            return Response({
+                'error': False,
+                'message': '转换成功',
+                **result
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                'error': True,
+                'message': f'服务器错误: {str(e)}',
+                'detail': traceback.format_exc()
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # 确保media目录存在
-            os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+class ConvertAllEmployeesView(APIView):
+    """一次上传，为排班表中的所有员工生成日历
+
+    默认返回包含每位员工 .ics 文件的 zip；output=urls 时返回员工名到下载链接的映射。
+    """
+    parser_classes = (MultiPartParser,)
+    throttle_classes = (UploadRateThrottle,)
+
+    def post(self, request):
+        try:
+            if 'file' not in request.FILES:
+                return Response({
+                    'error': True,
+                    'message': '没有上传文件'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            excel_file = request.FILES['file']
+            output = request.data.get('output', 'zip')
+
+            # 检查文件类型
+            if not excel_file.name.endswith(('.xlsx', '.xls')):
+                return Response({
+                    'error': True,
+                    'message': '请上传Excel文件（.xlsx或.xls格式）'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if output not in ('zip', 'urls'):
+                return Response({
+                    'error': True,
+                    'message': 'output 参数只能是 zip 或 urls'
+                }, status=status.HTTP_400_BAD_REQUEST)
 
-            # 使用转换类处理文件
             try:
-                scheduler = ShiftScheduler(temp_excel_path)
-                
-                if not scheduler.read_excel():
-                    return Response({
-                        'error': True,
-                        'message': '无法读取Excel文件，请检查文件格式'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
+                scheduler = load_scheduler(
+                    excel_file,
+                    all_sheets=is_truthy(request.data.get('all_sheets', '')),
+                    time_zone=request.data.get('time_zone'),
+                )
+
                 if not scheduler.get_week_info():
                     return Response({
                         'error': True,
                         'message': '无法获取周信息，请检查Excel文件格式'
                     }, status=status.HTTP_400_BAD_REQUEST)
-                    
+
                 if not scheduler.get_days_info():
                     return Response({
                         'error': True,
                         'message': '无法获取日期信息，请检查Excel文件格式'
                     }, status=status.HTTP_400_BAD_REQUEST)
-                    
-                employee_row = scheduler.find_employee_row(employee_name)
-                if employee_row is None:
+
+                if not scheduler.get_employees():
                     return Response({
                         'error': True,
-                        'message': '未找到该员工的排班信息'
+                        'message': '未找到员工信息'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-                # 获取排班预览数据
-                schedule_preview = []
-                for day_info in scheduler.days_info:
-                    start_time, end_time, task = scheduler.get_shift_times(employee_row, day_info['column'])
-                    if start_time and end_time:
-                        schedule_preview.append({
-                            'date': day_info['date'],
-                            'day': day_info['day'], 
-                            'month': day_info['month'],
-                            'year': day_info['year'],
-                            'weekday': day_info['weekday'],
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'task': task if task else ''
-                        })
-                    
-                cal = scheduler.create_calendar(employee_row)
-                
-                # 保存iCal文件
-                if not scheduler.save_calendar(cal, output_path):
-                    return Response({
-                        'error': True,
-                        'message': '保存iCal文件失败'
-                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                # 与上一次签发比较，内容不变的事件沿用原来的 DTSTAMP 和 SEQUENCE
+                with stage('issue'):
+                    employees = scheduler.get_employees()
+                    issued = issue_events(scheduler, [scheduler.employee_key(employee) for employee in employees])
+                    stamps = {
+                        employee.name: issued[scheduler.employee_key(employee)]['stamps']
+                        for employee in employees
+                    }
+
+                # 所有员工共用同一次解析结果
+                with stage('build'):
+                    calendars = scheduler.create_all_calendars(stamps)
+                remember_scheduler(scheduler)
 
+                # 更新所有员工的订阅源
+                with stage('publish'):
+                    feed_urls = publish_all_schedules(scheduler, stamps)
+                record_roster(scheduler)
+
+                if output == 'zip':
+                    archive_name = f"schedules_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+                    response = HttpResponse(build_calendar_archive(calendars), content_type='application/zip')
+                    response['Content-Disposition'] = f'attachment; filename="{archive_name}"'
+                    return response
+
+                download_urls = {}
+                for employee, cal in calendars:
+                    download_urls[employee.name] = save_employee_calendar(cal, employee.name)
+
+            except ConversionError as e:
+                return Response({
+                    'error': True,
+                    'message': e.message
+                }, status=e.status_code, headers=e.headers)
             except Exception as e:
                 return Response({
                     'error': True,
                     'message': f'处理文件时出错: {str(e)}',
                     'detail': traceback.format_exc()
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            finally:
-                # 清理临时文件
-                try:
-                    os.unlink(temp_excel_path)
-                except:
-                    pass
 
-            # 返回成功响应，包含排班预览数据
             return Response({
                 'error': False,
                 'message': '转换成功',
-                'download_url': f'/api/download/{output_filename}/',
-                'schedule_preview': schedule_preview,
+                'download_urls': download_urls,
+                'feed_urls': feed_urls,
                 'week_info': scheduler.week_info
             }, status=status.HTTP_200_OK)
 
@@ -217,24 +276,210 @@ class ConvertExcelToICalView(APIView):
                 'detail': traceback.format_exc()
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class RosterDiffView(APIView):
+    """比较上传的排班表与每一周上一次转换过的版本，返回新增、删除和修改的班次"""
+    parser_classes = (MultiPartParser,)
+    throttle_classes = (UploadRateThrottle,)
+
+    def post(self, request):
+        try:
+            if 'file' not in request.FILES:
+                return Response({
+                    'error': True,
+                    'message': '没有上传文件'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            excel_file = request.FILES['file']
+
+            # 检查文件类型
+            if not excel_file.name.endswith(('.xlsx', '.xls')):
+                return Response({
+                    'error': True,
+                    'message': '请上传Excel文件（.xlsx或.xls格式）'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                weeks = roster_changes(excel_file, all_sheets=is_truthy(request.data.get('all_sheets', '')))
+            except ConversionError as e:
+                return Response({
+                    'error': True,
+                    'message': e.message
+                }, status=e.status_code, headers=e.headers)
+            except Exception as e:
+                return Response({
+                    'error': True,
+                    'message': f'处理文件时出错: {str(e)}',
+                    'detail': traceback.format_exc()
+                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            return Response({
+                'error': False,
+                'weeks': weeks
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                'error': True,
+                'message': f'服务器错误: {str(e)}',
+                'detail': traceback.format_exc()
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class BatchUploadView(APIView):
+    """一次上传多个排班表（字段名 files，可重复）
+
+    各文件并行处理，响应为 NDJSON：每完成一个文件输出一行结果
+    （index、filename、employees、week_info，失败时 error 为 True 和 message），
+    最后一行为汇总（done、total、failed）。提供 employee_name 时同时为该员工转换每个文件。
+    """
+    parser_classes = (MultiPartParser,)
+    throttle_classes = (UploadRateThrottle,)
+
+    def throttle_cost(self, request):
+        """每个文件消耗一个令牌"""
+        return max(len(request.FILES.getlist('files')), 1)
+
+    def post(self, request):
+        files = request.FILES.getlist('files')
+        if not files:
+            return Response({
+                'error': True,
+                'message': '没有上传文件'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        max_files = getattr(settings, 'BATCH_MAX_FILES', 20)
+        if len(files) > max_files:
+            return Response({
+                'error': True,
+                'message': f'一次最多上传 {max_files} 个文件'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        time_zone = request.data.get('time_zone')
+        try:
+            resolve_time_zone(time_zone)
+        except ConversionError as e:
+            return Response({
+                'error': True,
+                'message': e.message
+            }, status=e.status_code, headers=e.headers)
+
+        response = StreamingHttpResponse(
+            stream_batch(
+                files,
+                employee_name=(request.data.get('employee_name') or '').strip() or None,
+                all_sheets=is_truthy(request.data.get('all_sheets', '')),
+                time_zone=time_zone,
+            ),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # 关闭 nginx 的响应缓冲，每一行结果立即发送给前端
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class ConversionJobView(APIView):
+    """查询异步转换任务的状态，完成后返回与同步转换相同的结果"""
+
+    def get(self, request, job_id):
+        try:
+            job = ConversionJob.objects.get(pk=job_id)
+        except ConversionJob.DoesNotExist:
+            return Response({
+                'error': True,
+                'message': '任务不存在'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        if job.status == ConversionJob.STATUS_FAILED:
+            return Response({
+                'error': True,
+                'job_id': str(job.id),
+                'status': job.status,
+                'message': job.message
+            }, status=status.HTTP_200_OK)
+
+        payload = {
+            'error': False,
+            'job_id': str(job.id),
+            'status': job.status,
+            'message': job.message
+        }
+        if job.status == ConversionJob.STATUS_FINISHED:
+            payload.update(job.result)
+        return Response(payload, status=status.HTTP_200_OK)
+
 class DownloadICalView(APIView):
+    content_negotiation_class = CalendarContentNegotiation
+
     def get(self, request, filename):
         try:
-            file_path = os.path.join(settings.MEDIA_ROOT, filename)
-            if not os.path.exists(file_path):
+            file_path = resolve_download_path(filename)
+            if file_path is None:
                 return Response({
                     'error': True,
                     'message': '文件不存在'
                 }, status=status.HTTP_404_NOT_FOUND)
 
-            response = FileResponse(open(file_path, 'rb'))
-            response['Content-Type'] = 'text/calendar'
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+            return calendar_download_response(
+                request,
+                file_path,
+                filename,
+                download_filename(filename, request.GET.get('name')),
+            )
 
         except Exception as e:
             return Response({
                 'error': True,
                 'message': f'下载文件时出错: {str(e)}',
                 'detail': traceback.format_exc()
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+
+class EmployeeFeedView(APIView):
+    """员工的日历订阅源，合并所有上传过的排班表"""
+    content_negotiation_class = CalendarContentNegotiation
+
+    def get(self, request, token):
+        try:
+            try:
+                feed = EmployeeFeed.objects.get(token=token)
+            except EmployeeFeed.DoesNotExist:
+                return Response({
+                    'error': True,
+                    'message': '订阅源不存在'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            content, digest = render_feed(feed)
+            return calendar_content_response(
+                request,
+                content,
+                digest,
+                int(feed.updated_at.timestamp()),
+                f'{get_valid_filename(feed.employee_name)}.ics',
+                f'public, max-age={getattr(settings, "FEED_MAX_AGE", 300)}',
+            )
+
+        except Exception as e:
+            return Response({
+                'error': True,
+                'message': f'获取订阅源时出错: {str(e)}',
+                'detail': traceback.format_exc()
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class MetricsView(APIView):
+    """Prometheus 格式的各阶段耗时直方图，需要在设置中开启 METRICS_ENABLED"""
+
+    def get(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            return Response({
+                'error': True,
+                'message': '未启用指标接口'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class HealthView(APIView):
+    """健康检查：不导入解析依赖、不访问数据库；preloaded 表示启动预热是否已完成"""
+
+    def get(self, request):
+        return Response({
+            'status': 'ok',
+            'preloaded': is_preloaded()
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,111 @@
+"""启动预热
+
+pandas、openpyxl 等依赖只在解析排班表时才导入（见 readers.py），下载、订阅和健康检查
+不需要它们。为了不让第一位上传的用户承担导入和初始化的时间，服务进程启动时调用 preload()：
+
+- 导入解析用到的依赖；
+- 创建默认时区的 ZoneInfo 和本周的 UTC 偏移表；
+- 用一个很小的内存排班表走一遍 读取 → 解析 → 生成日历，初始化 pandas 和 openpyxl 内部的惰性状态。
+
+config/wsgi.py 和 config/asgi.py 在创建 application 之后调用它。配合 gunicorn --preload 时
+只在主进程中执行一次，fork 出的工作进程直接共享已经导入和初始化的状态。
+"""
+import io
+import logging
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 只在解析时才需要、由预热提前导入的模块
+PARSER_MODULES = ('numpy', 'pandas', 'openpyxl', 'icalendar')
+
+_preloaded = False
+
+
+def import_parsers():
+    """导入解析依赖；在创建进程池之前调用，fork 出的子进程不必各自再导入一次"""
+    import icalendar  # noqa: F401
+    import numpy  # noqa: F401
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+
+
+def is_preloaded():
+    return _preloaded
+
+
+def _sample_roster(monday):
+    """两名员工、日期为本周的最小排班表（.xlsx 字节内容）"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet['B1'] = '[WEEK 1]'
+    for index in range(7):
+        day = monday + timedelta(days=index)
+        column = 2 + index * 3
+        worksheet.cell(row=4, column=column, value=f'{day:%A} {day.day}/{day.month}')
+        for row, start, end in ((5, '9:00', '17:00'), (6, '17:00:00', '1:30')):
+            worksheet.cell(row=row, column=column, value=start)
+            worksheet.cell(row=row, column=column + 1, value=end)
+            worksheet.cell(row=row, column=column + 2, value='Kitchen')
+    worksheet['A5'] = 'Warmup A'
+    worksheet['A6'] = 'Warmup B'
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def preload(force=False):
+    """执行预热，返回各步骤的耗时（毫秒）；CONVERTER_PRELOAD 为 False 时不执行
+
+    预热失败只记录警告，不影响服务启动。
+    """
+    global _preloaded
+    if _preloaded or not (force or getattr(settings, 'CONVERTER_PRELOAD', True)):
+        return {}
+
+    from .ical import ShiftScheduler, calendar_events
+    from .timezones import DEFAULT_TIME_ZONE, get_zone
+
+    timings = {}
+
+    def step(name, function):
+        started = time.perf_counter()
+        result = function()
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    try:
+        step('import', import_parsers)
+        time_zone = getattr(settings, 'ROSTER_TIME_ZONE', DEFAULT_TIME_ZONE)
+        step('time_zone', lambda: get_zone(time_zone))
+
+        today = date.today()
+        content = step('sample', lambda: _sample_roster(today - timedelta(days=today.weekday())))
+
+        def convert():
+            scheduler = ShiftScheduler(content)
+            scheduler.set_output(
+                getattr(settings, 'ICAL_SERIALIZER', 'fast'),
+                getattr(settings, 'ICAL_INCLUDE_VTIMEZONE', False),
+            )
+            scheduler.set_time_zone(time_zone)
+            if not (scheduler.read_excel() and scheduler.get_week_info() and scheduler.get_days_info()):
+                raise ValueError('预热用的排班表无法解析')
+            # 同时计算并缓存本周的偏移表
+            for employee in scheduler.get_employees():
+                calendar_events(scheduler.create_calendar(scheduler.employee_key(employee)))
+
+        step('convert', convert)
+    except Exception as e:
+        logger.warning("预热失败: %s", e)
+        return timings
+
+    _preloaded = True
+    logger.info("预热完成: %s", ', '.join(f'{name}={ms}ms' for name, ms in timings.items()))
+    return timings
@@ -0,0 +1,229 @@
+import copy
+import logging
+import time
+from datetime import timedelta
+
+from .ical import ShiftScheduler, new_calendar
+from .names import EmployeeIndex
+from .records import Employee
+from .readers import list_sheet_names
+from .workers import get_parse_workers
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sheet(file_path, sheet_name, reader='streaming', anchor_dates=(), limits=None, layout=None):
+    """解析单个工作表（周信息、日期、员工和班次），返回可在进程间传递的解析状态"""
+    scheduler = ShiftScheduler(file_path, reader=reader, sheet_name=sheet_name)
+    scheduler.anchor_dates = anchor_dates
+    scheduler.limits = limits
+    scheduler.layout = layout
+
+    if not scheduler.read_excel() or not scheduler.get_week_info() or not scheduler.get_days_info():
+        return None
+
+    # 没有日期行的工作表（例如说明页）不是排班表
+    if not scheduler.days_info:
+        return None
+
+    scheduler.shifts = scheduler.extract_shifts()
+    return scheduler.snapshot()
+
+
+class MultiWeekScheduler:
+    """一个工作簿中每个工作表是一周的排班，合并为跨越整个时间段的日历
+
+    各工作表在进程池中并行解析。对外提供与 ShiftScheduler 相同的方法，
+    其中的“员工行”是员工名字，视图可以直接替换使用。
+    """
+
+    def __init__(self, file_path, reader='streaming', max_workers=None):
+        self.file_path = file_path  # 文件路径或字节内容（需要能传给子进程）
+        self.reader = reader
+        self.max_workers = max_workers
+        self.weeks = []  # 每个排班工作表对应一个 ShiftScheduler
+        self.serializer = 'icalendar'
+        self.include_vtimezone = False
+        self.week_info = None
+        self.days_info = []
+        self.employees = None
+        self.employee_index = None
+        self.content_hash = None
+        self.anchor_dates = ()  # 推断年份时参考的已知日期，传给每个工作表
+        self.limits = None  # 解析的行数和时间上限，传给每个工作表
+        self.layout = None  # 配置的表格布局，None 表示每个工作表各自识别（同一模板命中布局缓存）
+
+    def set_output(self, serializer, include_vtimezone=False):
+        self.serializer = serializer
+        self.include_vtimezone = include_vtimezone
+        for week in self.weeks:
+            week.set_output(serializer, include_vtimezone)
+
+    def set_time_zone(self, name):
+        for week in self.weeks:
+            week.set_time_zone(name)
+
+    def snapshot(self):
+        return {
+            'content_hash': self.content_hash,
+            'anchor_dates': tuple(self.anchor_dates),
+            'weeks': [week.snapshot() for week in self.weeks],
+            'employees': self.employees,
+            'employee_index': self.employee_index,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        scheduler = cls(None)
+        scheduler.content_hash = snapshot['content_hash']
+        scheduler.anchor_dates = tuple(snapshot.get('anchor_dates', ()))
+        scheduler.weeks = [ShiftScheduler.from_snapshot(week) for week in snapshot['weeks']]
+        scheduler.employees = snapshot.get('employees')
+        scheduler.employee_index = snapshot.get('employee_index')
+        return scheduler
+
+    def read_excel(self):
+        if self.weeks:
+            return True
+
+        try:
+            sheet_names = list_sheet_names(self.file_path)
+        except Exception as e:
+            logger.warning("读取Excel文件错误: %s", e)
+            return False
+
+        # 每个工作表各自计时；这里再限制整个工作簿的解析时间
+        timeout = self.limits.parse_timeout if self.limits is not None else None
+        deadline = time.monotonic() + timeout if timeout else None
+
+        if len(sheet_names) > 1 and self.max_workers != 1:
+            snapshots = self._parse_in_workers(sheet_names, deadline)
+        else:
+            snapshots = []
+            for sheet_name in sheet_names:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError('解析排班表超时')
+                snapshots.append(parse_sheet(
+                    self.file_path, sheet_name, self.reader, self.anchor_dates, self.limits, self.layout
+                ))
+
+        self.weeks = [
+            ShiftScheduler.from_snapshot(snapshot)
+            for snapshot in snapshots
+            if snapshot is not None
+        ]
+        self._align_years()
+        return bool(self.weeks)
+
+    def _parse_in_workers(self, sheet_names, deadline):
+        """在解析子进程中并行解析各工作表（见 workers.py），超时时只结束本次解析用到的子进程"""
+        # 时间上限由这里统一控制，子进程中不再单独限时（也不再为 pandas 读取另外创建子进程）
+        limits = copy.copy(self.limits)
+        if limits is not None:
+            limits.parse_timeout = None
+
+        return get_parse_workers(self.max_workers).map(deadline, parse_sheet, [
+            (self.file_path, sheet_name, self.reader, self.anchor_dates, limits, self.layout)
+            for sheet_name in sheet_names
+        ])
+
+    def _align_years(self):
+        """各工作表单独推断年份，这里按工作表顺序把跨年之后的周顺延到下一年"""
+        previous = None
+        for week in self.weeks:
+            for day_info in week.days_info:
+                current = day_info.to_date()
+                if current is None:
+                    continue
+                # 比上一天早半年以上，说明已经跨年
+                while previous is not None and current < previous - timedelta(days=180):
+                    day_info.year += 1
+                    current = day_info.to_date()
+                    if current is None:
+                        break
+                if current is not None:
+                    previous = current
+
+    def get_week_info(self):
+        self.week_info = ' / '.join(week.week_info for week in self.weeks if week.week_info)
+        return bool(self.weeks)
+
+    def get_days_info(self):
+        self.days_info = [day_info for week in self.weeks for day_info in week.days_info]
+        return bool(self.weeks)
+
+    def get_employees(self):
+        """所有工作表中员工的并集，按第一次出现的顺序排列"""
+        if self.employees is not None:
+            return self.employees
+
+        weeks = {}
+        for week in self.weeks:
+            for employee in week.get_employees():
+                weeks[employee.name] = weeks.get(employee.name, 0) + 1
+
+        self.employees = [Employee(name, weeks=count) for name, count in weeks.items()]
+        return self.employees
+
+    def get_employee_index(self):
+        if self.employee_index is None:
+            self.employee_index = EmployeeIndex(self.get_employees())
+        return self.employee_index
+
+    def find_employee_row(self, employee_name):
+        """在所有周的员工中查找，返回表中的员工名字作为后续查询的键"""
+        employee = self.get_employee_index().find(employee_name)
+        return None if employee is None else employee.name
+
+    def employee_candidates(self, employee_name, limit=5):
+        return self.get_employee_index().suggestions(employee_name, limit)
+
+    def employee_key(self, employee):
+        return employee.name
+
+    def employee_name_at(self, employee_name):
+        return employee_name
+
+    def iter_employee_weeks(self, employee_name):
+        """[(周排班, 员工行)]，只包含找到该员工的周
+
+        先在所有周的员工中确定表中的名字，各周只按规范化后完全相同的名字查找，
+        避免 "Li" 在没有 Li 的周里匹配到 "Lilian"。
+        """
+        name = self.find_employee_row(employee_name)
+        if name is None:
+            return []
+
+        weeks = []
+        for week in self.weeks:
+            employee = week.get_employee_index().exact(name)
+            if employee is not None:
+                weeks.append((week, employee.row))
+        return weeks
+
+    def get_employee_shifts(self, employee_name):
+        shifts = []
+        for week, row in self.iter_employee_weeks(employee_name):
+            shifts.extend(week.get_employee_shifts(row))
+        return shifts
+
+    def create_calendar(self, employee_name, stamps=None):
+        cal = new_calendar(self.serializer, self.include_vtimezone)
+        for week, row in self.iter_employee_weeks(employee_name):
+            week.add_shift_events(cal, row, stamps)
+        return cal
+
+    def create_all_calendars(self, stamps=None):
+        """stamps 为 {员工名: {uid: (dtstamp, sequence)}}"""
+        return [
+            (employee, self.create_calendar(self.employee_key(employee), (stamps or {}).get(employee.name)))
+            for employee in self.get_employees()
+        ]
+
+    def save_calendar(self, cal, output_file):
+        return ShiftScheduler.save_calendar(self, cal, output_file)
+
+
+def scheduler_weeks(scheduler):
+    """排班表中的各周：ShiftScheduler 本身就是一周，MultiWeekScheduler 包含多周"""
+    return getattr(scheduler, 'weeks', None) or [scheduler]
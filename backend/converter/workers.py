@@ -0,0 +1,151 @@
+"""解析排班表的子进程
+
+pandas 整表读取（.xls、流式读取失败时）和多工作表的并行解析在子进程中执行，
+以便按时间上限结束：超时时只结束执行这次解析的子进程，其他请求的解析不受影响。
+
+子进程可以复用：每个子进程一次执行一个任务，完成后回到空闲列表；被结束的子进程
+在下一次需要时重新创建。子进程由 forkserver 创建（不支持时使用 spawn），
+不会从多线程的服务进程中直接 fork；forkserver 预先导入解析依赖，创建子进程很快。
+同时存在的子进程数不超过 size（默认为 CPU 核数）。
+"""
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.connection import wait
+
+# forkserver 中预先导入的模块，子进程创建后不必再导入
+PRELOAD_MODULES = ['pandas', 'openpyxl']
+
+
+def _serve(connection):
+    """子进程：循环接收 (函数, 参数)，返回 ('ok', 结果) 或 ('error', 异常)"""
+    while True:
+        try:
+            function, args = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reply = ('ok', function(*args))
+        except Exception as e:
+            reply = ('error', e)
+        connection.send(reply)
+
+
+class _Worker:
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class ParseWorkers:
+    """可复用、可单独结束的解析子进程"""
+
+    def __init__(self, size=None):
+        self.size = size or os.cpu_count() or 1
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        if self.context.get_start_method() == 'forkserver':
+            self.context.set_forkserver_preload(PRELOAD_MODULES)
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+
+    def _acquire(self, deadline, block=True):
+        """取得一个子进程；没有名额时 block 为 False 返回 None，否则等到 deadline 后抛出 TimeoutError"""
+        if not block:
+            acquired = self._slots.acquire(blocking=False)
+        elif deadline is None:
+            acquired = self._slots.acquire()
+        else:
+            acquired = self._slots.acquire(timeout=max(deadline - time.monotonic(), 0))
+        if not acquired:
+            if block:
+                raise TimeoutError('解析排班表超时')
+            return None
+
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None or not worker.process.is_alive():
+            try:
+                worker = _Worker(self.context)
+            except Exception:
+                self._slots.release()
+                raise
+        return worker
+
+    def _release(self, worker, healthy=True):
+        if healthy:
+            with self._lock:
+                self._idle.append(worker)
+        else:
+            worker.kill()
+        self._slots.release()
+
+    def run(self, deadline, function, *args):
+        """在子进程中执行 function(*args)，超过 deadline（time.monotonic() 的值）时结束该子进程"""
+        return self.map(deadline, function, [args])[0]
+
+    def map(self, deadline, function, args_list):
+        """按顺序返回每组参数的结果，尽量并行执行；任何一个失败或超时时结束本次所有未完成的子进程
+
+        参数和结果需要能在进程间传递；文件对象先读取为字节。deadline 为 None 表示不限时。
+        """
+        results = [None] * len(args_list)
+        pending = list(enumerate(args_list))
+        running = {}  # 连接 -> (下标, 子进程)
+        try:
+            while pending or running:
+                # 已经有子进程在执行时不等待名额，先等待它们完成，避免多个请求互相占住名额
+                while pending:
+                    worker = self._acquire(deadline, block=not running)
+                    if worker is None:
+                        break
+                    index, args = pending.pop(0)
+                    try:
+                        worker.connection.send((function, args))
+                    except Exception:
+                        self._release(worker, healthy=False)
+                        raise
+                    running[worker.connection] = (index, worker)
+
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                ready = wait(list(running), timeout)
+                if not ready:
+                    raise TimeoutError('解析排班表超时')
+                for connection in ready:
+                    index, worker = running.pop(connection)
+                    try:
+                        status, value = connection.recv()
+                    except (EOFError, OSError):
+                        self._release(worker, healthy=False)
+                        raise RuntimeError('解析子进程意外退出')
+                    self._release(worker)
+                    if status == 'error':
+                        raise value
+                    results[index] = value
+        finally:
+            # 超时或出错时，本次仍在执行的解析没有必要继续，只结束这些子进程
+            for _, worker in running.values():
+                self._release(worker, healthy=False)
+        return results
+
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def get_parse_workers(size=None):
+    """进程内共用的解析子进程，第一次使用时按 size 创建"""
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            _workers = ParseWorkers(size)
+        return _workers
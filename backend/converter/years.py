@@ -0,0 +1,90 @@
+"""推断排班表日期的年份
+
+排班表只写了 "Monday 30/12" 这样的星期和日/月。候选年份中，
+优先选择星期与日期一致的年份；仍有多个候选时，选择离参考日期最近的一个。
+参考日期为今天和历史记录中已处理过的周（见 history.anchor_dates），
+因此补录旧排班或提前上传明年的排班都能得到正确的年份。
+"""
+from bisect import bisect_left
+from datetime import date
+
+WEEKDAYS = {name: index for index, name in enumerate(('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun'))}
+
+# 参考日期之前/之后最多考虑的年数
+YEARS_BEFORE = 8
+YEARS_AFTER = 2
+
+
+def weekday_index(name):
+    """'Monday' / 'mon' -> 0，无法识别时返回 None"""
+    return WEEKDAYS.get(str(name).strip().casefold()[:3])
+
+
+def _date_sequence(days, first_year):
+    """第一天落在 first_year 时各天的日期，后面的日期早于前一天时顺延到下一年"""
+    try:
+        current = date(first_year, days[0].month, days[0].day)
+    except ValueError:
+        return None
+
+    dates = [current]
+    for day in days[1:]:
+        year = current.year
+        while True:
+            try:
+                candidate = date(year, day.month, day.day)
+            except ValueError:
+                # 2月29日之类只在部分年份存在的日期
+                if year > current.year + 4:
+                    return None
+                year += 1
+                continue
+            if candidate >= current:
+                break
+            year += 1
+        dates.append(candidate)
+        current = candidate
+    return dates
+
+
+def _distance(day, references):
+    """day 与最近的参考日期相差的天数，references 已排序"""
+    index = bisect_left(references, day)
+    neighbours = references[max(index - 1, 0):index + 1]
+    return min(abs((day - reference).days) for reference in neighbours)
+
+
+def infer_years(days, anchors=(), today=None):
+    """为 days（records.Day 列表，按列顺序）就地写入 year"""
+    if not days:
+        return days
+
+    today = today or date.today()
+    references = sorted({today, *anchors})
+    low = min(today.year - YEARS_BEFORE, references[0].year - 1)
+    high = max(today.year + YEARS_AFTER, references[-1].year + 1)
+
+    best_key, best_dates = None, None
+    for year in range(low, high + 1):
+        dates = _date_sequence(days, year)
+        if dates is None:
+            continue
+        mismatches = sum(
+            1 for day, value in zip(days, dates)
+            if weekday_index(day.weekday) not in (None, value.weekday())
+        )
+        key = (mismatches, _distance(dates[0], references), -year)
+        if best_key is None or key < best_key:
+            best_key, best_dates = key, dates
+
+    if best_dates is None:
+        # 日期本身无效（例如 31/2），沿用原来的规则：今年，跨年时 1 月算下一年
+        months = {day.month for day in days}
+        is_year_end = 12 in months and 1 in months
+        for day in days:
+            day.year = today.year + 1 if (is_year_end and day.month == 1) else today.year
+        return days
+
+    for day, value in zip(days, best_dates):
+        day.year = value.year
+    return days